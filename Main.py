@@ -1,16 +1,54 @@
 from fastapi import FastAPI, Request, Form
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, HttpUrl
-from typing import List
-from datetime import datetime
+from typing import List, Optional
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from collections import OrderedDict, deque
 import tldextract
 import re
 import uuid
 import urllib.parse
 import socket
-from ipwhois import IPWhois
+import asyncio
+import ipaddress
+import json
+import logging
+import os
+import pathlib
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+import metrics
+from templates import Raw, Template, etag_matches
 
-app = FastAPI(title="Phish Investigator — Main")
+log = logging.getLogger("phish.main")
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    warm_up()
+    start_rev = STORE.version  # 인덱스를 만드는 동안 다른 워커가 쓴 기록도 놓치지 않도록 먼저 읽어 둔다
+    load_clusters()
+    tasks = []
+    if SHARED_STATE:
+        tasks.append(asyncio.create_task(follow_shared_changes(start_rev)))
+        tasks.extend(asyncio.create_task(enrichment_worker()) for _ in range(ENRICH_WORKERS))
+    else:
+        # 보강 작업은 프로세스 메모리에만 있으므로 종료 전에 끝나지 못한 기록을 다시 맡긴다
+        # (공유 모드에서는 SQLite 작업 큐에 남아 있다가 임대가 끝나면 다시 처리된다)
+        for inv in STORE.pending():
+            schedule_enrichment(inv)
+    yield
+    for task in tasks:
+        task.cancel()
+    DNS_CACHE.flush()
+    RDAP_CACHE.flush()
+
+app = FastAPI(title="Phish Investigator — Main", lifespan=lifespan)
+metrics.install(app, "main")
 
 # --- 데이터 구조 ---
 class Investigation(BaseModel):
@@ -22,8 +60,485 @@ class Investigation(BaseModel):
     score: int
     decision: str
     notes: str = ""
+    enrichment: str = "pending"   # pending / enriched / failed
+    ip: Optional[str] = None
+    whois: Optional[dict] = None
+    asn: Optional[str] = None
+    network_handle: Optional[str] = None
+    canonical_url: str = ""
+    hits: int = 1                 # 같은 정규화 URL이 제출된 횟수
+    last_seen_at: Optional[datetime] = None
+    seq: int = 0                  # 저장소가 부여하는 단조 증가 번호 (페이지 커서로 사용)
+
+# --- 조사 기록 저장소 ---
+# 모든 기록은 바로 SQLite(WAL) 파일에 쓰고(재시작해도 유지), 최근 기록만 고정 크기 deque에 함께 둔다.
+# 메모리 구간은 도메인/IP/결정별 인덱스로, 그보다 오래된 구간은 SQLite 인덱스로 조회한다.
+# 공유 모드(PHISH_SHARED_STATE=1, 여러 uvicorn 워커)에서는 deque 없이 SQLite에서만 읽는다.
+STORE_DB = os.environ.get("PHISH_STORE_DB", "investigations.sqlite3")
+SHARED_STATE = os.environ.get("PHISH_SHARED_STATE", "") == "1"
+RECENT_CAPACITY = 1000
+ROW_COLUMNS = "seq, data, hits, last_seen_at"  # 제출 횟수는 data와 별도 열에서 SQL 산술로만 갱신한다
+ENRICHMENT_FIELDS = ("ip", "notes", "whois", "asn", "network_handle", "enrichment")
+SCORE_BAND = 10  # min_score 조회용 점수 구간 폭: (score / 10, seq) 인덱스로 구간마다 seq 순서대로 읽는다
+
+class InvestigationStore:
+    def __init__(self, capacity: int = RECENT_CAPACITY, db_path: str = STORE_DB, shared: bool = False):
+        if shared and not db_path:
+            raise RuntimeError("공유 모드에는 PHISH_STORE_DB 파일 경로가 필요합니다.")
+        self.capacity = capacity
+        self.shared = shared
+        self._recent: deque = deque()  # 최신 기록이 앞쪽
+        self._by_id: dict = {}
+        self._by_domain: dict = {}     # domain -> {seq: Investigation}
+        self._by_ip: dict = {}
+        self._by_decision: dict = {}
+        self._db = sqlite3.connect(db_path or ":memory:", check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")  # WAL에서는 프로세스가 죽어도 커밋이 유지된다
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS investigations (seq INTEGER PRIMARY KEY, id TEXT UNIQUE,"
+            " domain TEXT, ip TEXT, decision TEXT, score INTEGER, submitted_at TEXT, data TEXT, rev INTEGER DEFAULT 0,"
+            " canonical TEXT, hits INTEGER DEFAULT 1, last_seen_at TEXT)"
+        )
+        columns = {r[1] for r in self._db.execute("PRAGMA table_info(investigations)")}
+        for col, decl in (("rev", "INTEGER DEFAULT 0"), ("canonical", "TEXT"),
+                          ("hits", "INTEGER DEFAULT 1"), ("last_seen_at", "TEXT")):
+            if col not in columns:
+                self._db.execute(f"ALTER TABLE investigations ADD COLUMN {col} {decl}")
+                if col == "hits":  # 이전 형식은 제출 횟수를 data 안에만 두었다
+                    self._db.execute("UPDATE investigations SET hits = COALESCE(json_extract(data, '$.hits'), 1)")
+        for col in ("domain", "ip", "decision", "submitted_at", "canonical"):
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS idx_inv_{col} ON investigations ({col}, seq)")
+        self._db.execute("DROP INDEX IF EXISTS idx_inv_score")  # score 범위 조건에서는 seq 순서를 못 쓰므로 구간 인덱스로 대체
+        self._db.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_inv_score_band ON investigations (score / {SCORE_BAND}, seq)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_inv_rev ON investigations (rev)")
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_inv_pending ON investigations (seq)"
+            " WHERE json_extract(data, '$.enrichment') = 'pending'"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+        self._db.execute("INSERT OR IGNORE INTO meta VALUES ('version', 0)")
+        # 저장소 파일마다 한 번 정하는 값. 파일을 지우거나 메모리 DB로 다시 시작하면 버전이 0부터 다시 세어지므로
+        # ETag에 함께 넣어 이전 응답의 ETag와 겹치지 않게 한다
+        self._db.execute("INSERT OR IGNORE INTO meta VALUES ('epoch', ?)", (uuid.uuid4().int >> 80,))
+        self._db.commit()
+        self._stored = self._db.execute("SELECT COUNT(*) FROM investigations").fetchone()[0]
+        self.epoch = self.counter("epoch")
+        self._version = self.counter("version")  # 추가/보강 때마다 증가 (/recent ETag), 재시작해도 이어진다
+
+    def __len__(self) -> int:
+        if self.shared:
+            return self._db.execute("SELECT COUNT(*) FROM investigations").fetchone()[0]
+        return self._stored
+
+    def counter(self, key: str) -> int:
+        """meta 테이블의 정수 카운터 (없으면 0). 공유 모드에서는 워커 간 신호로도 쓴다."""
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def bump_counter(self, key: str) -> int:
+        with self._db:
+            self._db.execute("INSERT OR IGNORE INTO meta VALUES (?, 0)", (key,))
+            return self._db.execute(
+                "UPDATE meta SET value = value + 1 WHERE key = ? RETURNING value", (key,)
+            ).fetchone()[0]
+
+    @property
+    def version(self) -> int:
+        if self.shared:
+            return self.counter("version")
+        return self._version
+
+    def _bump_version(self) -> int:
+        self._version = self._db.execute(
+            "UPDATE meta SET value = value + 1 WHERE key = 'version' RETURNING value"
+        ).fetchone()[0]
+        return self._version
+
+    @staticmethod
+    def _from_row(seq: int, data: str, hits: Optional[int] = None, last_seen_at: Optional[str] = None) -> Investigation:
+        inv = Investigation.model_validate_json(data)
+        inv.seq = seq
+        if hits is not None:
+            inv.hits = hits
+        if last_seen_at:
+            inv.last_seen_at = datetime.fromisoformat(last_seen_at)
+        return inv
+
+    @staticmethod
+    def _index_add(index: dict, key, inv: Investigation) -> None:
+        if key:
+            index.setdefault(key, {})[inv.seq] = inv
+
+    @staticmethod
+    def _index_remove(index: dict, key, inv: Investigation) -> None:
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.pop(inv.seq, None)
+            if not bucket:
+                del index[key]
+
+    def add(self, inv: Investigation) -> None:
+        with self._db:
+            rev = self._bump_version()
+            inv.seq = self._db.execute(
+                "INSERT INTO investigations (id, domain, ip, decision, score, submitted_at, data, rev, canonical, hits)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (inv.id, inv.domain, inv.ip, inv.decision, inv.score,
+                 inv.submitted_at.isoformat(), inv.model_dump_json(), rev, inv.canonical_url, inv.hits),
+            ).lastrowid
+        self._stored += 1
+        if self.shared:
+            return
+        self._recent.appendleft(inv)
+        self._by_id[inv.id] = inv
+        self._index_add(self._by_domain, inv.domain, inv)
+        self._index_add(self._by_ip, inv.ip, inv)
+        self._index_add(self._by_decision, inv.decision, inv)
+        while len(self._recent) > self.capacity:
+            self._evict(self._recent.pop())
+
+    def _evict(self, inv: Investigation) -> None:
+        # 행은 이미 디스크에 있으므로 메모리 인덱스에서만 뺀다
+        del self._by_id[inv.id]
+        self._index_remove(self._by_domain, inv.domain, inv)
+        self._index_remove(self._by_ip, inv.ip, inv)
+        self._index_remove(self._by_decision, inv.decision, inv)
+
+    def update_enrichment(self, inv: Investigation) -> None:
+        """보강 결과 필드만 디스크에 반영한다. 보강이 끝나기 전에 가져온 사본이 다른 필드를 덮어쓰지 않는다."""
+        values = inv.model_dump(mode="json", include=set(ENRICHMENT_FIELDS))
+        paths = ", ".join(f"'$.{field}', json(?)" for field in ENRICHMENT_FIELDS)
+        with self._db:
+            rev = self._bump_version()
+            self._db.execute(
+                f"UPDATE investigations SET ip = ?, data = json_set(data, {paths}), rev = ? WHERE id = ?",
+                (inv.ip, *(json.dumps(values[field]) for field in ENRICHMENT_FIELDS), rev, inv.id),
+            )
+        if self._by_id.get(inv.id) is inv:
+            self._index_add(self._by_ip, inv.ip, inv)
+
+    def add_hit(self, inv: Investigation) -> None:
+        """재제출 횟수를 hits = hits + 1 로 올리고 inv에 최신 값을 반영한다."""
+        now = datetime.now()
+        with self._db:
+            rev = self._bump_version()
+            inv.hits = self._db.execute(
+                "UPDATE investigations SET hits = hits + 1, last_seen_at = ?, rev = ? WHERE id = ? RETURNING hits",
+                (now.isoformat(), rev, inv.id),
+            ).fetchone()[0]
+        inv.last_seen_at = now
+        cached = self._by_id.get(inv.id)
+        if cached is not None:
+            cached.hits, cached.last_seen_at = inv.hits, now
+
+    def iter_latest(self, limit: int, page: int = 1000):
+        """가장 최근 limit건을 오래된 것부터 돌려준다.
+
+        다른 스레드에서 불려도 되도록 한 페이지씩 끝까지 읽어 연결을 오래 붙잡지 않는다.
+        """
+        row = self._db.execute(
+            "SELECT seq FROM investigations ORDER BY seq DESC LIMIT 1 OFFSET ?", (limit - 1,)
+        ).fetchone()
+        last = row[0] - 1 if row else 0
+        while True:
+            rows = self._db.execute(
+                f"SELECT {ROW_COLUMNS} FROM investigations WHERE seq > ? ORDER BY seq LIMIT ?", (last, page)
+            ).fetchall()
+            for row in rows:
+                yield self._from_row(*row)
+            if len(rows) < page:
+                return
+            last = rows[-1][0]
+
+    def changes_since(self, rev: int) -> List[tuple]:
+        """공유 모드에서 다른 워커가 추가/보강한 기록을 (rev, Investigation) 으로 rev 순서대로 가져온다."""
+        rows = self._db.execute(
+            f"SELECT rev, {ROW_COLUMNS} FROM investigations WHERE rev > ? ORDER BY rev", (rev,)
+        ).fetchall()
+        return [(row[0], self._from_row(*row[1:])) for row in rows]
+
+    def pending(self) -> List[Investigation]:
+        """보강이 끝나지 않은 기록을 오래된 것부터 돌려준다 (재시작 전에 처리하지 못한 기록)."""
+        rows = self._db.execute(
+            f"SELECT {ROW_COLUMNS} FROM investigations"
+            " WHERE json_extract(data, '$.enrichment') = 'pending' ORDER BY seq"
+        ).fetchall()
+        # 메모리에 올라와 있는 기록은 같은 객체를 보강해야 화면과 저장소가 어긋나지 않는다
+        return [self._by_id.get(inv.id, inv) for inv in (self._from_row(*row) for row in rows)]
+
+    def find_canonical(self, canonical: str, since: datetime) -> Optional[Investigation]:
+        row = self._db.execute(
+            f"SELECT {ROW_COLUMNS} FROM investigations WHERE canonical = ? AND submitted_at >= ?"
+            " ORDER BY seq DESC LIMIT 1",
+            (canonical, since.isoformat()),
+        ).fetchone()
+        return self._from_row(*row) if row else None
+
+    def get(self, inv_id: str) -> Optional[Investigation]:
+        inv = self._by_id.get(inv_id)
+        if inv is not None:
+            return inv
+        row = self._db.execute(f"SELECT {ROW_COLUMNS} FROM investigations WHERE id = ?", (inv_id,)).fetchone()
+        return self._from_row(*row) if row else None
+
+    def recent(self, limit: int = 20) -> List[Investigation]:
+        return self.query(limit=limit)[0]
+
+    def query(
+        self,
+        limit: int = 20,
+        cursor: Optional[int] = None,
+        domain: Optional[str] = None,
+        ip: Optional[str] = None,
+        decision: Optional[str] = None,
+        min_score: Optional[int] = None,
+        since: Optional[datetime] = None,
+    ) -> tuple:
+        """seq 내림차순으로 최대 limit건과 다음 페이지 커서(없으면 None)를 반환한다."""
+        # 메모리 구간: 가장 좁은 인덱스에서 후보를 고른다
+        if domain or ip or decision:
+            buckets = []
+            if domain:
+                buckets.append(self._by_domain.get(domain, {}))
+            if ip:
+                buckets.append(self._by_ip.get(ip, {}))
+            if decision:
+                buckets.append(self._by_decision.get(decision, {}))
+            bucket = min(buckets, key=len)
+            candidates = (bucket[k] for k in sorted(bucket, reverse=True))
+        else:
+            candidates = iter(self._recent)
+
+        items: List[Investigation] = []
+        for inv in candidates:
+            if cursor is not None and inv.seq >= cursor:
+                continue
+            if since is not None and inv.submitted_at < since:
+                if not (domain or ip or decision):
+                    break  # deque는 시간순이므로 이후 기록은 모두 더 오래됨
+                continue
+            if (domain and inv.domain != domain) or (ip and inv.ip != ip) \
+                    or (decision and inv.decision != decision) or (min_score is not None and inv.score < min_score):
+                continue
+            items.append(inv)
+            if len(items) > limit:
+                break
+
+        # 디스크 구간: 메모리에 없는 오래된 기록이 있으면 부족한 만큼 SQLite 인덱스로 이어서 조회
+        if len(items) <= limit and (self.shared or self._stored > len(self._recent)):
+            where, args = [], []
+            oldest = items[-1].seq if items else cursor
+            if oldest is not None:
+                where.append("seq < ?")
+                args.append(oldest)
+            for col, val in (("domain", domain), ("ip", ip), ("decision", decision)):
+                if val:
+                    where.append(f"{col} = ?")
+                    args.append(val)
+            if since is not None:
+                where.append("submitted_at >= ?")
+                args.append(since.isoformat())
+            need = limit + 1 - len(items)
+            if min_score is None:
+                sql = f"SELECT {ROW_COLUMNS} FROM investigations"
+                if where:
+                    sql += " WHERE " + " AND ".join(where)
+                sql += " ORDER BY seq DESC LIMIT ?"
+                args.append(need)
+            else:
+                sql, args = self._score_band_query(where, args, min_score, need)
+            items.extend(self._from_row(*row) for row in self._db.execute(sql, args))
+
+        next_cursor = items[limit - 1].seq if len(items) > limit else None
+        return items[:limit], next_cursor
+
+    @staticmethod
+    def _score_band_query(where: List[str], args: list, min_score: int, need: int) -> tuple:
+        # "score >= ?" 범위 조건은 seq 역순 스캔으로 풀려 드문 고득점 조회가 이력 전체를 훑는다.
+        # 점수 구간마다 (score / 10, seq) 인덱스로 최신 need건만 읽고 합친다. 경계 구간만 score로 다시 거른다.
+        arms, arm_args = [], []
+        for band in range(max(min_score, 0) // SCORE_BAND, 100 // SCORE_BAND + 1):
+            cond = [f"score / {SCORE_BAND} = ?", *where]
+            if band * SCORE_BAND < min_score:
+                cond.append("score >= ?")
+            arms.append(
+                f"SELECT * FROM (SELECT {ROW_COLUMNS} FROM investigations WHERE " + " AND ".join(cond)
+                + " ORDER BY seq DESC LIMIT ?)"
+            )
+            arm_args += [band, *args] + ([min_score] if band * SCORE_BAND < min_score else []) + [need]
+        if not arms:
+            return f"SELECT {ROW_COLUMNS} FROM investigations WHERE 0", []
+        return " UNION ALL ".join(arms) + " ORDER BY seq DESC LIMIT ?", arm_args + [need]
+
+STORE = InvestigationStore(shared=SHARED_STATE)
+
+# --- 연관 인프라 클러스터 인덱스 ---
+# 특징(도메인/IP/ASN/네트워크 핸들) → 조사 id 역색인과 union-find로 클러스터를 점진적으로 유지한다.
+# 대형 호스팅 ASN은 무관한 사이트를 한 덩어리로 묶으므로 ASN은 역색인에만 두고 병합에는 쓰지 않는다.
+# 인덱스는 최근 CLUSTER_CAPACITY건까지만 메모리에 둔다. 넘치면 최근 절반으로 다시 만들므로
+# 그보다 오래된 조사는 클러스터 조회에 나오지 않는다.
+CLUSTER_LINK_KINDS = ("domain", "ip", "net")
+CLUSTER_CAPACITY = int(os.environ.get("PHISH_CLUSTER_CAPACITY", "100000"))
+
+class ClusterIndex:
+    def __init__(self, link_kinds=CLUSTER_LINK_KINDS):
+        self.link_kinds = frozenset(link_kinds)
+        self._parent: dict = {}
+        self._size: dict = {}       # 루트 -> 클러스터 내 조사 건수
+        self._next: dict = {}       # 조사끼리, 특징끼리 따로 잇는 원형 연결 리스트: 병합 시 포인터 교환만으로 목록을 합친다
+        self._heads: dict = {}      # 루트 -> [조사 링의 시작 노드, 특징 링의 시작 노드] (없으면 None)
+        self._postings: dict = {}   # (kind, value) -> [inv id, ...]
+        self._features: dict = {}   # inv id -> [(kind, value), ...]
+
+    def __len__(self) -> int:
+        return len(self._features)
+
+    def _node(self, node, is_inv: bool) -> None:
+        if node not in self._parent:
+            self._parent[node] = node
+            self._size[node] = 1 if is_inv else 0
+            self._next[node] = node
+            self._heads[node] = [node, None] if is_inv else [None, node]
+
+    def find(self, node):
+        parent = self._parent
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+        while parent[node] != root:  # 경로 압축
+            parent[node], node = root, parent[node]
+        return root
+
+    def _union(self, a, b) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return
+        if self._size[ra] < self._size[rb]:
+            ra, rb = rb, ra
+        self._parent[rb] = ra
+        self._size[ra] += self._size.pop(rb)
+        heads, other = self._heads[ra], self._heads.pop(rb)
+        for i in (0, 1):
+            if other[i] is None:
+                continue
+            if heads[i] is None:
+                heads[i] = other[i]
+            else:
+                a, b = heads[i], other[i]
+                self._next[a], self._next[b] = self._next[b], self._next[a]
+
+    def add(self, inv: Investigation) -> None:
+        self._node(("inv", inv.id), True)
+        self._features.setdefault(inv.id, [])
+        if inv.domain and inv.domain != "(unknown)":
+            self.link(inv.id, "domain", inv.domain)
+
+    def add_enrichment(self, inv: Investigation) -> None:
+        if inv.id not in self._features:
+            return  # 용량 초과로 인덱스에서 빠진 오래된 조사
+        for kind, value in (("ip", inv.ip), ("asn", inv.asn), ("net", inv.network_handle)):
+            if value:
+                self.link(inv.id, kind, value)
+
+    def link(self, inv_id: str, kind: str, value: str) -> None:
+        key = (kind, value)
+        if key in self._features.get(inv_id, ()):
+            return
+        self._postings.setdefault(key, []).append(inv_id)
+        self._features.setdefault(inv_id, []).append(key)
+        if kind in self.link_kinds:
+            self._node(key, False)
+            self._node(("inv", inv_id), True)
+            self._union(("inv", inv_id), key)
+
+    def postings(self, kind: str, value: str) -> List[str]:
+        return self._postings.get((kind, value), [])
+
+    def cluster_of(self, inv_id: str, limit: int = 100) -> Optional[dict]:
+        node = ("inv", inv_id)
+        if node not in self._parent:
+            return None
+        root = self.find(node)
+        member_head, feature_head = self._heads[root]
+        return {
+            "cluster_id": f"{root[0]}:{root[1]}",
+            "size": self._size[root],
+            "features": [{"kind": kind, "value": value} for kind, value in self._ring(feature_head, limit)],
+            "members": [inv_id for _, inv_id in self._ring(member_head, limit)],
+        }
+
+    def _ring(self, start, limit: int) -> list:
+        # 원형 리스트를 최대 limit칸만 따라간다 (클러스터 크기와 무관하게 O(limit))
+        out = []
+        cur = start
+        while cur is not None and len(out) < limit:
+            out.append(cur)
+            cur = self._next[cur]
+            if cur == start:
+                break
+        return out
+
+CLUSTERS = ClusterIndex()
+_CLUSTER_REPLAY: Optional[list] = None  # 재구성 중이면 그동안 반영한 기록 (새 인덱스에 다시 넣는다)
+
+def build_clusters(limit: int) -> ClusterIndex:
+    index = ClusterIndex()
+    for inv in STORE.iter_latest(limit):
+        index.add(inv)
+        index.add_enrichment(inv)
+    return index
+
+def load_clusters(limit: int = CLUSTER_CAPACITY) -> None:
+    # 앱 시작 시(lifespan) 최근 기록으로 인덱스를 만든다
+    global CLUSTERS
+    CLUSTERS = build_clusters(limit)
 
-STORE: List[Investigation] = []
+def index_cluster(inv: Investigation) -> None:
+    CLUSTERS.add(inv)
+    CLUSTERS.add_enrichment(inv)
+    if _CLUSTER_REPLAY is not None:
+        _CLUSTER_REPLAY.append(inv)
+    elif len(CLUSTERS) > CLUSTER_CAPACITY:
+        _start_cluster_rebuild()
+
+def index_cluster_enrichment(inv: Investigation) -> None:
+    CLUSTERS.add_enrichment(inv)
+    if _CLUSTER_REPLAY is not None:
+        _CLUSTER_REPLAY.append(inv)
+
+def _start_cluster_rebuild() -> None:
+    # union-find는 개별 삭제가 안 되므로 최근 절반으로 새 인덱스를 만든다. 요청을 막지 않도록 스레드에서 만들고,
+    # 그동안은 기존 인덱스로 응답하다가 끝나면 그 사이 들어온 기록을 다시 넣고 교체한다.
+    global _CLUSTER_REPLAY
+    _CLUSTER_REPLAY = []
+    future = asyncio.get_running_loop().run_in_executor(None, build_clusters, CLUSTER_CAPACITY // 2)
+    future.add_done_callback(_finish_cluster_rebuild)
+
+def _finish_cluster_rebuild(future) -> None:
+    global CLUSTERS, _CLUSTER_REPLAY
+    replay, _CLUSTER_REPLAY = _CLUSTER_REPLAY, None
+    if future.cancelled() or future.exception() is not None:
+        return  # 다음 추가 때 다시 시도한다
+    index = future.result()
+    for inv in replay:
+        index.add(inv)
+        index.add_enrichment(inv)
+    CLUSTERS = index
+
+# --- 도메인 추출기 (오프라인 PSL 스냅샷) ---
+# 공개 접미사 목록(PSL)을 네트워크로 받지 않는다. 고정된 로컬 스냅샷을 쓰고, 없으면 tldextract 내장 스냅샷을 쓴다.
+PSL_FILE = os.environ.get(
+    "PHISH_PSL_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "public_suffix_list.dat")
+)
+
+def build_extractor(psl_file: str = PSL_FILE) -> tldextract.TLDExtract:
+    urls = (pathlib.Path(psl_file).as_uri(),) if os.path.exists(psl_file) else ()
+    return tldextract.TLDExtract(cache_dir=None, suffix_list_urls=urls, fallback_to_snapshot=True)
+
+TLD_EXTRACT = build_extractor()
 
 # --- 휴리스틱 점수 계산 ---
 BAD_WORDS = [
@@ -33,29 +548,129 @@ BAD_WORDS = [
 SUSPICIOUS_TLDS = ["zip", "mov", "top", "xyz", "gq", "tk", "cf", "ml", "ga"]
 BRANDS = ["microsoft", "apple", "naver", "kakao", "nh", "kb", "woori", "kbstar", "line", "pay"]
 
-def heuristic_score(url: str) -> int:
-    score = 0
+LOOKALIKE_RE = re.compile(r"[@%]|0auth|paypa1|mícrosoft|faceb00k|g00gle")
+RULES_FILE = os.environ.get("PHISH_RULES_FILE", "")  # {"bad_words": [...], "brands": [...], "suspicious_tlds": [...]}
+
+class KeywordMatcher:
+    """Aho-Corasick 오토마톤. 한 번의 순회로 URL에 포함된 모든 키워드(겹침 포함)를 찾는다."""
+
+    def __init__(self, weights: dict):
+        self.keywords = list(weights)
+        self.weights = [weights[k] for k in self.keywords]
+        self._goto: List[dict] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[tuple] = [()]
+        for idx, word in enumerate(self.keywords):
+            state = 0
+            for ch in word:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = nxt
+            self._out[state] += (idx,)
+        # BFS로 실패 링크를 만들고 출력 집합을 합친다
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def score(self, text: str) -> int:
+        goto, fail, out = self._goto, self._fail, self._out
+        matched = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                matched.update(out[state])
+        return sum(self.weights[i] for i in matched)
+
+class ScoringRules:
+    def __init__(self, bad_words: List[str], brands: List[str], suspicious_tlds: List[str]):
+        weights: dict = {}
+        for w in bad_words:
+            weights[w] = weights.get(w, 0) + 8
+        for b in brands:
+            weights[b] = weights.get(b, 0) + 10
+        self.matcher = KeywordMatcher(weights)
+        self.suspicious_tlds = frozenset(suspicious_tlds)
+
+def load_rules(path: str = "") -> ScoringRules:
+    if not path:
+        return ScoringRules(BAD_WORDS, BRANDS, SUSPICIOUS_TLDS)
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("규칙 파일의 최상위는 객체여야 합니다.")
+    lists = {}
+    for key, default in (("bad_words", BAD_WORDS), ("brands", BRANDS), ("suspicious_tlds", SUSPICIOUS_TLDS)):
+        values = data.get(key, default)
+        if not isinstance(values, list) or not all(isinstance(v, str) and v for v in values):
+            raise ValueError(f"{key} 는 비어 있지 않은 문자열 목록이어야 합니다.")
+        lists[key] = [v.lower() for v in values]
+    return ScoringRules(**lists)
+
+RULES = load_rules(RULES_FILE)
+RULES_LOADED_AT = datetime.now()  # 이 시각 이전에 저장된 조사는 이전 규칙으로 점수를 매긴 것이다
+
+def reload_rules() -> None:
+    # 새 규칙을 끝까지 만든 뒤 참조만 교체하므로 처리 중인 요청은 이전 규칙으로 안전하게 끝난다
+    global RULES, RULES_LOADED_AT
+    RULES = load_rules(RULES_FILE)
+    RULES_LOADED_AT = datetime.now()
+    # 이전 규칙으로 매긴 판정을 재사용하지 않도록 판정 캐시를 비운다
+    VERDICTS.clear()
+
+# 공유 모드에서는 /rules/reload 를 받은 워커가 meta의 "rules" 카운터를 올리고,
+# 나머지 워커는 follow_shared_changes() 주기마다 카운터를 확인해 규칙 파일을 다시 읽는다.
+RULES_REV = STORE.counter("rules")
+
+def sync_rules() -> None:
+    global RULES_REV
+    rev = STORE.counter("rules")
+    if rev == RULES_REV:
+        return
+    RULES_REV = rev
+    try:
+        reload_rules()
+    except (OSError, ValueError):
+        pass  # 요청을 받은 워커가 이미 같은 파일을 검증했다. 그 사이 파일이 깨졌으면 이전 규칙을 유지한다
+
+@metrics.timed_function("heuristic_score")
+def heuristic_score(url: str, ext=None) -> int:
+    rules = RULES
     u = url.lower()
-    for w in BAD_WORDS:
-        if w in u:
-            score += 8
-    for b in BRANDS:
-        if b in u:
-            score += 10
+    score = rules.matcher.score(u)
     if len(url) > 120:
         score += 5
     if url.count("?") + url.count("&") > 3:
         score += 5
-    if re.search(r"[@%]|0auth|paypa1|mícrosoft|faceb00k|g00gle", u):
+    if LOOKALIKE_RE.search(u):
         score += 12
-    ext = tldextract.extract(url)
+    if ext is None:
+        ext = TLD_EXTRACT(url)
     tld = (ext.suffix or "").split(".")[-1]
-    if tld in SUSPICIOUS_TLDS:
+    if tld in rules.suspicious_tlds:
         score += 10
     if ext.subdomain and len(ext.subdomain.split('.')) >= 2:
         score += 6
     return min(score, 100)
 
+def warm_up() -> None:
+    # PSL 적재와 점수 규칙의 첫 호출 비용을 첫 요청이 아니라 앱 시작 시점에 치른다 (계측 히스토그램에는 남기지 않음)
+    url = "https://login.warm-up.example.co.kr/verify"
+    heuristic_score.__wrapped__(url, TLD_EXTRACT(url))
+
 def decision_from_score(score: int) -> str:
     if score >= 80:
         return "자동 신고 + 긴급 차단"
@@ -72,6 +687,7 @@ HTML_HEAD = """
     <meta name="viewport" content="width=device-width, initial-scale=1">
     <title>Phish Investigator — 메인</title>
     <script src="https://unpkg.com/htmx.org@1.9.12" crossorigin="anonymous"></script>
+    <script src="https://unpkg.com/htmx.org@1.9.12/dist/ext/sse.js" crossorigin="anonymous"></script>
     <script src="https://cdn.tailwindcss.com"></script>
   </head>
   <body class="bg-slate-50 text-slate-900">
@@ -94,39 +710,32 @@ HTML_FOOT = """
 """
 
 # --- 테이블 렌더링 ---
-def render_recent_table(items: List[Investigation]) -> str:
-    if not items:
-        return "<p class='text-sm text-slate-500'>아직 기록이 없습니다.</p>"
-    rows = []
-    for it in items[:20]:
-        if it.score >= 80:
-            badge = "bg-red-600 text-white"
-            label = "위험"
-        elif 50 <= it.score < 80:
-            badge = "bg-yellow-400 text-black"
-            label = "주의"
-        else:
-            badge = "bg-blue-600 text-white"
-            label = "안전"
-        rows.append(
-            f"""
-            <tr class="border-b last:border-0">
+# 행/테이블 HTML은 미리 컴파일한 템플릿으로 만들고(값은 자동 이스케이프),
+# 행은 (id, 보강 상태, 제출 횟수)별로 캐시해 새로고침 때마다 다시 만들지 않는다.
+ROW_CACHE_SIZE = 2000
+_ROW_CACHE: "OrderedDict[tuple, str]" = OrderedDict()
+
+ROW_TEMPLATE = Template("""
+            <tr id="row-{id}" class="border-b last:border-0">
               <td class="py-3 px-4 align-top">
-                <div class="font-mono text-xs break-all">{it.url}</div>
-                <div class="text-[11px] text-slate-500">{it.domain}</div>
+                <div class="font-mono text-xs break-all">{url}</div>
+                <div class="text-[11px] text-slate-500">{domain}{ip}</div>
               </td>
-              <td class="py-3 px-4 align-top">{it.submitted_at.strftime('%Y-%m-%d %H:%M:%S')}</td>
+              <td class="py-3 px-4 align-top">{submitted_at}</td>
               <td class="py-3 px-4 align-top">
                 <span class="px-3 py-1 rounded-full text-xs {badge}">
-                  {it.score} {label}
-                </span>
+                  {score} {label}
+                </span>{hits}
+              </td>
+              <td class="py-3 px-4 align-top">{decision}</td>
+              <td class="py-3 px-4 align-top">
+                <span class="text-xs">{status}</span>
+                <div class="text-[11px] text-slate-500">{enrichment}</div>
               </td>
-              <td class="py-3 px-4 align-top">{it.decision}</td>
-              <td class="py-3 px-4 align-top"><span class="text-xs">{it.status}</span></td>
             </tr>
-            """
-        )
-    return f"""
+            """)
+
+TABLE_TEMPLATE = Template("""
     <div class="overflow-hidden rounded-2xl shadow bg-white">
       <table class="w-full text-sm">
         <thead class="bg-slate-100 text-slate-700">
@@ -138,10 +747,123 @@ def render_recent_table(items: List[Investigation]) -> str:
             <th class="text-left px-4 py-2">상태</th>
           </tr>
         </thead>
-        <tbody>{''.join(rows)}</tbody>
+        <tbody id="recent-rows"{live_attrs}>{rows}</tbody>
       </table>
     </div>
-    """
+    """)
+
+def render_row(it: Investigation) -> str:
+    key = (it.id, it.enrichment, it.hits)
+    cached = _ROW_CACHE.get(key)
+    if cached is not None:
+        _ROW_CACHE.move_to_end(key)
+        return cached
+    if it.score >= 80:
+        badge = "bg-red-600 text-white"
+        label = "위험"
+    elif 50 <= it.score < 80:
+        badge = "bg-yellow-400 text-black"
+        label = "주의"
+    else:
+        badge = "bg-blue-600 text-white"
+        label = "안전"
+    row = ROW_TEMPLATE.render(
+        id=it.id,
+        url=it.url,
+        domain=it.domain,
+        ip=f" · {it.ip}" if it.ip else "",
+        submitted_at=it.submitted_at.strftime('%Y-%m-%d %H:%M:%S'),
+        badge=badge,
+        score=it.score,
+        label=label,
+        hits=Raw(f' <span class="text-[11px] text-slate-500">×{it.hits}</span>' if it.hits > 1 else ""),
+        decision=it.decision,
+        status=it.status,
+        enrichment=it.enrichment,
+    )
+    _ROW_CACHE[key] = row
+    while len(_ROW_CACHE) > ROW_CACHE_SIZE:
+        _ROW_CACHE.popitem(last=False)
+    return row
+
+@metrics.timed_function("render_table")
+def render_recent_table(items: List[Investigation], limit: int = 20, live: bool = False) -> str:
+    """live=True 이면 SSE(/events)로 새 행/보강된 행을 받아 테이블을 갱신한다."""
+    if not items:
+        if live:
+            # 첫 기록이 생기면 테이블 전체를 한 번 불러온다
+            return """<p class='text-sm text-slate-500' hx-ext="sse" sse-connect="/events"
+               hx-get="/recent" hx-trigger="sse:row" hx-target="#recent" hx-swap="innerHTML">아직 기록이 없습니다.</p>"""
+        return "<p class='text-sm text-slate-500'>아직 기록이 없습니다.</p>"
+    live_attrs = ' hx-ext="sse" sse-connect="/events" sse-swap="row" hx-swap="afterbegin"' if live else ""
+    return TABLE_TEMPLATE.render(
+        live_attrs=Raw(live_attrs),
+        rows=Raw("".join(render_row(it) for it in items[:limit])),
+    )
+
+# --- WHOIS 박스 렌더링 ---
+def render_whois_box(inv: Investigation) -> str:
+    # 보강이 끝나지 않았으면 HTMX가 1초 간격으로 다시 조회하는 자리표시자를 반환
+    if inv.enrichment == "pending":
+        return f"""
+        <div id="whois-{inv.id}" hx-get="/whois/{inv.id}" hx-trigger="load delay:1s" hx-swap="outerHTML"
+             class="mt-4 bg-white rounded-2xl shadow p-4 text-sm text-slate-500">
+          🌍 WHOIS 조회 중...
+        </div>
+        """
+    whois_data = inv.whois or {}
+    html = f"""
+        <div id="whois-{inv.id}" class="mt-4 bg-white rounded-2xl shadow p-4 text-sm">
+          <h3 class="text-base font-semibold mb-2">🌍 WHOIS 정보</h3>
+        """
+    if inv.ip:
+        html += f"<p><b>IP:</b> {inv.ip}</p>"
+    if "network" in whois_data:
+        net = whois_data["network"] or {}
+        html += f"<p><b>Name:</b> {net.get('name')}</p>"
+        html += f"<p><b>Country:</b> {net.get('country')}</p>"
+        html += f"<p><b>Handle:</b> {net.get('handle')}</p>"
+    if "asn" in whois_data:
+        html += f"<p><b>ASN:</b> {whois_data.get('asn')}</p>"
+    if inv.enrichment == "failed":
+        html += f"<p class='text-red-600'>조회 실패: {whois_data.get('error', '')}</p>"
+    html += "</div>"
+    return html
+
+# --- 실시간 행 푸시 (SSE) ---
+SSE_QUEUE_SIZE = 256
+SSE_HEARTBEAT = 15.0
+
+class RowEvents:
+    """새 행/보강된 행 HTML을 연결된 모든 SSE 구독자에게 전달한다."""
+
+    def __init__(self):
+        self._subscribers: set = set()
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SSE_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def publish(self, inv: Investigation, update: bool = False) -> None:
+        if not self._subscribers:
+            return
+        row = render_row(inv)
+        if update:
+            # 이미 화면에 있는 행은 id로 찾아 교체 (htmx out-of-band swap)
+            row = row.replace(f'<tr id="row-{inv.id}"', f'<tr id="row-{inv.id}" hx-swap-oob="outerHTML"', 1)
+        data = "".join(f"data: {line}\n" for line in row.strip().splitlines())
+        message = f"event: row\n{data}\n"
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                pass  # 느린 구독자는 이벤트를 건너뛰고, 새로고침으로 따라잡는다
+
+ROW_EVENTS = RowEvents()
 
 # --- 메인 페이지 ---
 @app.get("/", response_class=HTMLResponse)
@@ -169,82 +891,616 @@ async def index(_: Request):
         <h2 class="text-lg font-semibold">최근 조사</h2>
         <button class="text-xs underline" hx-get="/recent" hx-target="#recent" hx-swap="innerHTML">새로고침</button>
       </div>
-      {render_recent_table(STORE)}
+      {render_recent_table(STORE.recent(), live=True)}
     </section>
     """
     return HTML_HEAD + form_html + f"<div id='recent'>{recent_html}</div>" + HTML_FOOT
 
+RECENT_CACHE_SIZE = 64
+_RECENT_CACHE: "OrderedDict[str, tuple]" = OrderedDict()  # 쿼리 문자열 -> (버전, HTML)
+
 @app.get("/recent", response_class=HTMLResponse)
-async def recent():
+async def recent(
+    request: Request,
+    cursor: Optional[int] = None,
+    limit: int = 20,
+    domain: Optional[str] = None,
+    ip: Optional[str] = None,
+    decision: Optional[str] = None,
+    min_score: Optional[int] = None,
+):
+    # 저장소 버전이 그대로면 304, 같은 쿼리를 이미 그렸으면 캐시된 HTML을 돌려준다
+    # 버전은 한 번만 읽는다. 조회 도중 다른 워커가 커밋해도 결과는 읽어 둔 버전 이상을 담으므로
+    # 오래된 HTML이 더 새 버전으로 캐시되지 않는다
+    version = STORE.version
+    query_key = str(request.url.query)
+    etag = f'W/"{STORE.epoch:x}-{version}-{zlib.crc32(query_key.encode()):08x}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    cached = _RECENT_CACHE.get(query_key)
+    if cached is not None and cached[0] == version:
+        return HTMLResponse(cached[1], headers=headers)
+
+    limit = max(1, min(limit, 100))
+    items, next_cursor = STORE.query(
+        limit=limit, cursor=cursor, domain=domain, ip=ip, decision=decision, min_score=min_score
+    )
+    filters = {k: v for k, v in (("domain", domain), ("ip", ip), ("decision", decision),
+                                 ("min_score", min_score)) if v not in (None, "")}
+    live = not filters and cursor is None
+    refresh_url = "/recent?" + urllib.parse.urlencode({**filters, "limit": limit})
+    more_html = ""
+    if next_cursor is not None:
+        next_url = "/recent?" + urllib.parse.urlencode({**filters, "limit": limit, "cursor": next_cursor})
+        more_html = f"""
+    <div class="mt-2 text-right">
+      <button class="text-xs underline" hx-get="{next_url.replace('&', '&amp;')}" hx-target="#recent" hx-swap="innerHTML">다음 페이지</button>
+    </div>
+    """
     html = f"""
     <div class="flex items-center justify-between mb-2">
       <h2 class="text-lg font-semibold">최근 조사</h2>
-      <button class="text-xs underline" hx-get="/recent" hx-target="#recent" hx-swap="innerHTML">새로고침</button>
+      <button class="text-xs underline" hx-get="{refresh_url.replace('&', '&amp;')}" hx-target="#recent" hx-swap="innerHTML">새로고침</button>
     </div>
-    {render_recent_table(STORE)}
+    {render_recent_table(items, limit, live=live)}
+    {more_html}
     """
-    return html
+    _RECENT_CACHE[query_key] = (version, html)
+    _RECENT_CACHE.move_to_end(query_key)
+    while len(_RECENT_CACHE) > RECENT_CACHE_SIZE:
+        _RECENT_CACHE.popitem(last=False)
+    return HTMLResponse(html, headers=headers)
+
+@app.get("/events")
+async def events(request: Request):
+    queue = ROW_EVENTS.subscribe()
+
+    async def stream():
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    message = ": ping\n\n"
+                yield message
+        finally:
+            ROW_EVENTS.unsubscribe(queue)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 # --- URL 검증 모델 ---
 class UrlModel(BaseModel):
     url: HttpUrl
 
-# --- 조사 로직 + WHOIS/IP 조회 ---
-@app.post("/investigate", response_class=HTMLResponse)
-async def investigate(url: str = Form(...)):
-    # URL 검증
+# --- DNS/RDAP 결과 캐시 (TTL + LRU, 실패 결과 단기 캐시, SQLite 영속화) ---
+CACHE_DB = os.environ.get("PHISH_CACHE_DB", "enrich_cache.sqlite3")  # 빈 값이면 디스크 저장 안 함
+
+class TTLCache:
+    """TTL 만료와 LRU 축출을 함께 쓰는 캐시. 실패 결과는 negative_ttl 동안만 보관한다."""
+
+    def __init__(
+        self, name: str, maxsize: int, ttl: float, negative_ttl: float, db_path: str = "", read_through: bool = False
+    ):
+        """read_through: 메모리에 없는 키를 디스크에서 한 번 더 찾는다 (다른 워커 프로세스와 공유할 때만 의미가 있다)."""
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, is_error, expires_at)
+        self._lock = threading.Lock()
+        self._db = None
+        self._read_through = False
+        if db_path:
+            self._read_through = read_through
+            # 디스크 쓰기는 이벤트 루프 밖의 전용 스레드 하나가 모아서 한 트랜잭션으로 처리한다
+            self._pending: dict = {}  # key -> 저장할 행
+            self._flush_scheduled = False
+            self._db_lock = threading.Lock()
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"cache-{name}")
+            self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")  # 캐시는 잃어도 다시 조회하면 되므로 커밋마다 fsync하지 않는다
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache (ns TEXT, key TEXT, value TEXT, error INTEGER,"
+                " expires REAL, PRIMARY KEY (ns, key))"
+            )
+            self._load()
+
+    def _load(self) -> None:
+        now = time.time()
+        self._db.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+        self._db.commit()
+        rows = self._db.execute(
+            "SELECT key, value, error, expires FROM cache WHERE ns = ? ORDER BY expires DESC LIMIT ?",
+            (self.name, self.maxsize),
+        ).fetchall()
+        for key, value, error, expires in reversed(rows):
+            self._data[key] = (json.loads(value), bool(error), expires)
+
+    def get(self, key: str) -> Optional[tuple]:
+        """(value, is_error) 를 반환하고, 없거나 만료되었으면 None."""
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None and self._read_through:
+            # 다른 워커 프로세스가 저장한 항목일 수 있으므로 디스크를 한 번 확인한다
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT value, error, expires FROM cache WHERE ns = ? AND key = ?", (self.name, key)
+                ).fetchone()
+            if row is not None:
+                entry = (json.loads(row[0]), bool(row[1]), row[2])
+        with self._lock:
+            if entry is not None:
+                self._data.setdefault(key, entry)
+            if entry is None or entry[2] <= time.time():
+                if entry is not None:
+                    self._data.pop(key, None)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            if entry[1]:
+                self.negative_hits += 1
+            return entry[0], entry[1]
+
+    def put(self, key: str, value, error: bool = False) -> None:
+        expires = time.time() + (self.negative_ttl if error else self.ttl)
+        with self._lock:
+            self._data[key] = (value, error, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            if self._db is None:
+                return
+            self._pending[key] = (self.name, key, json.dumps(value, default=str), int(error), expires)
+            if self._flush_scheduled:
+                return  # 이미 예약된 저장이 이 행도 함께 쓴다
+            self._flush_scheduled = True
+        self._writer.submit(self._flush)
+
+    def _flush(self) -> None:
+        with self._lock:
+            rows = list(self._pending.values())
+            self._pending.clear()
+            self._flush_scheduled = False
+        if not rows:
+            return
+        with self._db_lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)", rows)
+
+    def flush(self) -> None:
+        """아직 디스크에 쓰지 않은 항목을 모두 저장할 때까지 기다린다 (종료 시 호출)."""
+        if self._db is not None:
+            self._writer.submit(self._flush).result()
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._data)
+
+    def clear(self) -> None:
+        # 메모리 항목만 비운다 (디스크에 남은 항목은 공유 모드에서 다른 워커가 쓰는 것이다)
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "negative_hits": self.negative_hits,
+        }
+
+DNS_CACHE = TTLCache("dns", maxsize=10_000, ttl=300, negative_ttl=30, db_path=CACHE_DB, read_through=SHARED_STATE)
+RDAP_CACHE = TTLCache(
+    "rdap", maxsize=5_000, ttl=86_400, negative_ttl=120, db_path=CACHE_DB, read_through=SHARED_STATE
+)
+
+# RDAP 결과는 IP("ip:")와 공지된 네트워크 CIDR("net:") 양쪽에 저장해 같은 대역의 이웃 IP도 캐시를 공유한다.
+_RDAP_PREFIXES: set = set()  # (버전, 프리픽스 길이) — 이웃 IP 조회 시 확인할 대역 크기
+
+def _index_rdap_prefix(cidr: str) -> Optional[str]:
     try:
-        UrlModel(url=url)
-    except Exception:
-        return "<p class='text-red-600 text-sm'>유효한 URL이 아닙니다.</p>"
+        net = ipaddress.ip_network(cidr.strip(), strict=False)
+    except ValueError:
+        return None
+    _RDAP_PREFIXES.add((net.version, net.prefixlen))
+    return str(net)
 
-    # 도메인/IP 추출
-    ext = tldextract.extract(url)
-    domain = ".".join([p for p in [ext.domain, ext.suffix] if p])
+for _key in RDAP_CACHE.keys():
+    if _key.startswith("net:"):
+        _index_rdap_prefix(_key[4:])
+
+def rdap_cache_get(ip_addr: str) -> Optional[tuple]:
+    hit = RDAP_CACHE.get(f"ip:{ip_addr}")
+    if hit is not None:
+        return hit
+    addr = ipaddress.ip_address(ip_addr)
+    for version, prefixlen in sorted(_RDAP_PREFIXES, key=lambda p: -p[1]):
+        if version != addr.version:
+            continue
+        net = ipaddress.ip_network(f"{addr}/{prefixlen}", strict=False)
+        hit = RDAP_CACHE.get(f"net:{net}")
+        if hit is not None:
+            return hit
+    return None
+
+def rdap_cache_put(ip_addr: str, whois_data, error: bool = False) -> None:
+    RDAP_CACHE.put(f"ip:{ip_addr}", whois_data, error)
+    if error:
+        return
+    cidrs = ((whois_data.get("network") or {}).get("cidr") or whois_data.get("asn_cidr") or "")
+    for cidr in cidrs.split(","):
+        net = _index_rdap_prefix(cidr)
+        if net:
+            RDAP_CACHE.put(f"net:{net}", whois_data)
+
+# --- DNS/RDAP 보강 파이프라인 ---
+# 블로킹 호출(gethostbyname, lookup_rdap)은 단계별 스레드 풀에서 실행하고 단계별 타임아웃을 둔다.
+# 풀을 나눠 두어 느린 RDAP 조회가 스레드를 모두 차지해도 DNS 조회는 막히지 않는다.
+ENRICH_WORKERS = 8
+DNS_TIMEOUT = 3.0
+RDAP_TIMEOUT = 10.0
+DNS_POOL = ThreadPoolExecutor(max_workers=ENRICH_WORKERS, thread_name_prefix="enrich-dns")
+RDAP_POOL = ThreadPoolExecutor(max_workers=ENRICH_WORKERS, thread_name_prefix="enrich-rdap")
+_ENRICH_TASKS: set = set()  # 진행 중인 작업이 GC되지 않도록 참조 유지
+
+class StageBusy(Exception):
+    """풀이 포화되어 조회를 시작하지도 못하고 시간이 다 된 경우. 네트워크 실패가 아니므로 부정 캐시하지 않는다."""
+
+def resolve_domain(domain: str) -> str:
+    return socket.gethostbyname(domain)
+
+def lookup_rdap(ip_addr: str) -> dict:
+    from ipwhois import IPWhois  # 보강 경로에서만 쓰므로 처음 필요할 때 불러온다
+    # 재시도를 끄고 HTTP 호출마다 타임아웃을 걸어, 타임아웃 뒤에도 스레드가 오래 붙잡히지 않게 한다
+    return IPWhois(ip_addr, timeout=int(RDAP_TIMEOUT)).lookup_rdap(retry_count=0, rate_limit_timeout=0)
+
+async def run_stage(stage: str, pool: ThreadPoolExecutor, fn, arg, timeout: float):
+    loop = asyncio.get_running_loop()
+    started = threading.Event()
+
+    def call():
+        started.set()
+        return fn(arg)
+
+    with metrics.timed(stage):
+        try:
+            # 시간이 다 됐을 때 아직 대기열에 있던 작업은 wait_for의 취소로 함께 빠진다
+            return await asyncio.wait_for(loop.run_in_executor(pool, call), timeout)
+        except asyncio.TimeoutError:
+            if not started.is_set():
+                raise StageBusy(f"{stage} 작업 대기열 포화") from None
+            raise
+
+def _error_text(e: Exception) -> str:
+    return str(e) or type(e).__name__
 
-    ip_addr = None
-    whois_data = None
+async def cached_resolve(domain: str) -> str:
+    hit = DNS_CACHE.get(domain)
+    if hit is not None:
+        value, error = hit
+        if error:
+            raise LookupError(value)
+        return value
     try:
-        ip_addr = socket.gethostbyname(domain)
-        w = IPWhois(ip_addr)
-        whois_data = w.lookup_rdap()
+        ip_addr = await run_stage("dns", DNS_POOL, resolve_domain, domain, DNS_TIMEOUT)
+    except StageBusy:
+        raise
     except Exception as e:
-        whois_data = {"error": str(e)}
+        DNS_CACHE.put(domain, _error_text(e), error=True)
+        raise
+    DNS_CACHE.put(domain, ip_addr)
+    return ip_addr
+
+async def cached_rdap(ip_addr: str) -> dict:
+    hit = rdap_cache_get(ip_addr)
+    if hit is not None:
+        value, error = hit
+        if error:
+            raise LookupError(value)
+        return value
+    try:
+        whois_data = await run_stage("rdap", RDAP_POOL, lookup_rdap, ip_addr, RDAP_TIMEOUT)
+    except StageBusy:
+        raise
+    except Exception as e:
+        rdap_cache_put(ip_addr, _error_text(e), error=True)
+        raise
+    rdap_cache_put(ip_addr, whois_data)
+    return whois_data
+
+async def enrich(inv: Investigation) -> None:
+    try:
+        inv.ip = await cached_resolve(inv.domain)
+        inv.notes = f"IP: {inv.ip}"
+        inv.whois = await cached_rdap(inv.ip)
+        inv.asn = inv.whois.get("asn") or None
+        inv.network_handle = (inv.whois.get("network") or {}).get("handle") or None
+        inv.enrichment = "enriched"
+    except Exception as e:
+        inv.whois = {"error": _error_text(e)}
+        inv.enrichment = "failed"
+    STORE.update_enrichment(inv)
+    index_cluster_enrichment(inv)
+    if not SHARED_STATE:  # 공유 모드에서는 follow_shared_changes()가 모든 워커에 전파한다
+        ROW_EVENTS.publish(inv, update=True)
+
+def schedule_enrichment(inv: Investigation) -> None:
+    if SHARED_STATE:
+        ENRICH_QUEUE.put(inv.id)
+        return
+    task = asyncio.create_task(enrich(inv))
+    _ENRICH_TASKS.add(task)
+    task.add_done_callback(_ENRICH_TASKS.discard)
+
+# --- 워커 간 공유 상태 (PHISH_SHARED_STATE=1) ---
+# 보강 작업은 SQLite 작업 큐에 넣고 어느 워커든 가져가 처리한다. 임대 시간이 지난 작업은 다시 가져갈 수 있다.
+SHARED_POLL_INTERVAL = 0.5
+JOB_LEASE = 60.0
+
+class EnrichmentQueue:
+    def __init__(self, db_path: str):
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS enrich_jobs (id INTEGER PRIMARY KEY, inv_id TEXT,"
+            " claimed_by TEXT, claimed_at REAL)"
+        )
+        self._db.commit()
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    def put(self, inv_id: str) -> None:
+        with self._db:
+            self._db.execute("INSERT INTO enrich_jobs (inv_id) VALUES (?)", (inv_id,))
+
+    def claim(self) -> Optional[tuple]:
+        now = time.time()
+        # 빈 큐에서는 읽기만 하고 끝낸다 (쓰기 잠금은 가져갈 작업이 있을 때만 잡는다)
+        ready = self._db.execute(
+            "SELECT 1 FROM enrich_jobs WHERE claimed_by IS NULL OR claimed_at < ? LIMIT 1", (now - JOB_LEASE,)
+        ).fetchone()
+        if ready is None:
+            return None
+        with self._db:
+            return self._db.execute(
+                "UPDATE enrich_jobs SET claimed_by = ?, claimed_at = ? WHERE id = ("
+                " SELECT id FROM enrich_jobs WHERE claimed_by IS NULL OR claimed_at < ? ORDER BY id LIMIT 1"
+                ") RETURNING id, inv_id",
+                (self.worker_id, now, now - JOB_LEASE),
+            ).fetchone()
 
-    # 점수 및 결정
-    score = heuristic_score(url)
-    decision = decision_from_score(score)
+    def done(self, job_id: int) -> None:
+        with self._db:
+            self._db.execute("DELETE FROM enrich_jobs WHERE id = ?", (job_id,))
 
-    # 조사 기록 저장
-    inv = Investigation(
+ENRICH_QUEUE = EnrichmentQueue(STORE_DB) if SHARED_STATE else None
+
+SHARED_MAX_BACKOFF = 30.0
+
+async def _backoff(name: str, failures: int) -> None:
+    # 한 번의 실패(예: 잠긴 DB의 sqlite3.OperationalError)로 백그라운드 작업이 조용히 죽지 않도록
+    # 기록만 남기고 점점 길게 쉬었다가 다시 돈다
+    log.exception("%s 실패 (%d회 연속)", name, failures)
+    await asyncio.sleep(min(SHARED_POLL_INTERVAL * 2 ** failures, SHARED_MAX_BACKOFF))
+
+async def enrichment_worker() -> None:
+    failures = 0
+    while True:
+        try:
+            job = ENRICH_QUEUE.claim()
+            if job is None:
+                await asyncio.sleep(SHARED_POLL_INTERVAL)
+                continue
+            job_id, inv_id = job
+            inv = STORE.get(inv_id)
+            if inv is not None and inv.enrichment == "pending":
+                await enrich(inv)
+            ENRICH_QUEUE.done(job_id)
+            failures = 0
+        except Exception:
+            # done() 전에 실패한 작업은 임대가 끝나면 다시 가져간다
+            failures += 1
+            await _backoff("보강 작업", failures)
+
+async def follow_shared_changes(last_rev: int) -> None:
+    # 다른 워커가 추가/보강한 기록을 클러스터 인덱스에 반영하고 이 워커의 SSE 구독자에게 전달한다
+    last_seq = None
+    failures = 0
+    while True:
+        await asyncio.sleep(SHARED_POLL_INTERVAL)
+        try:
+            if last_seq is None:
+                last_seq = STORE.query(limit=1)[0][0].seq if len(STORE) else 0
+            sync_rules()
+            if STORE.version == last_rev:
+                continue
+            # 읽은 행의 rev까지만 전진한다. 두 번 읽는 사이에 커밋된 행은 다음 주기에 가져온다
+            for rev, inv in STORE.changes_since(last_rev):
+                index_cluster(inv)
+                ROW_EVENTS.publish(inv, update=inv.seq <= last_seq)
+                last_seq = max(last_seq, inv.seq)
+                last_rev = rev
+            failures = 0
+        except Exception:
+            failures += 1
+            await _backoff("공유 변경 추적", failures)
+
+# --- 조사 로직 ---
+def analyze_url(url: str, canonical: str = "") -> Optional[Investigation]:
+    """검증 → 도메인 추출 → 점수/결정까지 수행한다. 유효하지 않은 URL이면 None.
+
+    점수는 제출된 URL 그대로 계산한다. canonical 은 판정 캐시/중복 제거 키로만 저장한다.
+    """
+    try:
+        with metrics.timed("validate"):
+            UrlModel(url=url)
+    except Exception:
+        return None
+
+    with metrics.timed("extract"):
+        ext = TLD_EXTRACT(url)
+    domain = ".".join([p for p in [ext.domain, ext.suffix] if p])
+    score = heuristic_score(url, ext)
+    return Investigation(
         id=str(uuid.uuid4()),
         url=url,
+        canonical_url=canonical,
         domain=domain or "(unknown)",
         submitted_at=datetime.now(),
         status="analyzed",
         score=score,
-        decision=decision,
-        notes=f"IP: {ip_addr or 'N/A'}",
+        decision=decision_from_score(score),
+        notes="IP: N/A",
     )
-    STORE.insert(0, inv)
 
-    # WHOIS 박스 (테이블 아래)
-    whois_html = ""
-    if whois_data:
-        whois_html += """
-        <div class="mt-4 bg-white rounded-2xl shadow p-4 text-sm">
-          <h3 class="text-base font-semibold mb-2">🌍 WHOIS 정보</h3>
-        """
-        if ip_addr:
-            whois_html += f"<p><b>IP:</b> {ip_addr}</p>"
-        if "network" in whois_data:
-            net = whois_data["network"]
-            whois_html += f"<p><b>Name:</b> {net.get('name')}</p>"
-            whois_html += f"<p><b>Country:</b> {net.get('country')}</p>"
-            whois_html += f"<p><b>Handle:</b> {net.get('handle')}</p>"
-        if "asn" in whois_data:
-            whois_html += f"<p><b>ASN:</b> {whois_data.get('asn')}</p>"
-        whois_html += "</div>"
+def record(inv: Investigation) -> None:
+    STORE.add(inv)
+    index_cluster(inv)
+    if inv.canonical_url:
+        VERDICTS.put(inv.canonical_url, inv.id)
+    if not SHARED_STATE:
+        ROW_EVENTS.publish(inv)
+
+# --- URL 정규화 + 판정 캐시 + 동시 제출 병합 ---
+# 호스트 대소문자, 기본 포트, 끝 슬래시, 쿼리 순서, 퍼센트 이스케이프의 16진수 대소문자만 다른 URL은 같은 조사로 취급한다.
+# 프래그먼트, 퍼센트 이스케이프, 인코딩되지 않은 문자는 점수 신호(키워드, [@%] 규칙)이자 경로 의미(%2F ≠ /)를 바꾸므로 인코딩·디코딩하거나 버리지 않는다.
+VERDICT_TTL = 3600.0
+VERDICT_CACHE_SIZE = 50_000
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_PCT_ESCAPE_RE = re.compile(r"%[0-9a-fA-F]{2}")
+VERDICTS = TTLCache("verdict", maxsize=VERDICT_CACHE_SIZE, ttl=VERDICT_TTL, negative_ttl=0)  # 정규화 URL -> 조사 id
+
+def _normalize_escapes(text: str) -> str:
+    # 이스케이프의 16진수만 대문자로 맞춘다. 인코딩되지 않은 문자를 인코딩하면 점수가 다른 두 URL
+    # (예: "/한" 과 "/%ED%95%9C", "a b" 와 "a%20b")이 같은 키를 갖게 되므로 원래 형태를 그대로 둔다
+    return _PCT_ESCAPE_RE.sub(lambda m: m.group(0).upper(), text)
+
+def canonicalize_url(url: str) -> Optional[str]:
+    try:
+        parts = urllib.parse.urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    if not scheme or not host:
+        return None
+    netloc = f"[{host}]" if ":" in host else host
+    if parts.username is not None:
+        userinfo = parts.username + (f":{parts.password}" if parts.password is not None else "")
+        netloc = f"{userinfo}@{netloc}"
+    if port is not None and port != _DEFAULT_PORTS.get(scheme):
+        netloc += f":{port}"
+    path = _normalize_escapes(parts.path).rstrip("/") or "/"
+    query = "&".join(sorted(_normalize_escapes(p) for p in parts.query.split("&") if p))
+    fragment = _normalize_escapes(parts.fragment)
+    return urllib.parse.urlunsplit((scheme, netloc, path, query, fragment))
+
+class SingleFlight:
+    """같은 키로 동시에 들어온 작업은 첫 번째만 실행하고 나머지는 그 결과를 기다린다."""
+
+    def __init__(self):
+        self._calls: dict = {}
+
+    async def do(self, key: str, fn) -> tuple:
+        """(결과, 직접 실행했는지)를 반환한다. 앞선 실행이 취소되면 기다리던 호출 중 하나가 다시 실행한다."""
+        while True:
+            fut = self._calls.get(key)
+            if fut is None:
+                break
+            try:
+                return await asyncio.shield(fut), False
+            except asyncio.CancelledError:
+                if not fut.cancelled():
+                    raise  # 기다리던 쪽 자신이 취소됨
+        fut = asyncio.get_running_loop().create_future()
+        self._calls[key] = fut
+        try:
+            result = await fn()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                fut.cancel()
+            else:
+                fut.set_exception(e)
+                fut.exception()  # 기다리는 쪽이 없어도 경고가 남지 않게 한다
+            raise
+        else:
+            fut.set_result(result)
+            return result, True
+        finally:
+            del self._calls[key]
+
+FLIGHTS = SingleFlight()
+
+def find_verdict(canonical: str) -> Optional[Investigation]:
+    hit = VERDICTS.get(canonical)
+    if hit is not None:
+        inv = STORE.get(hit[0])
+        if inv is not None:
+            return inv
+    if SHARED_STATE:
+        # 다른 워커가 먼저 조사했을 수 있다
+        # 현재 규칙을 읽어 들이기 전의 조사는 재사용하지 않는다
+        since = max(datetime.now() - timedelta(seconds=VERDICT_TTL), RULES_LOADED_AT)
+        inv = STORE.find_canonical(canonical, since=since)
+        if inv is not None:
+            VERDICTS.put(canonical, inv.id)
+        return inv
+    return None
+
+def record_hit(inv: Investigation) -> None:
+    STORE.add_hit(inv)
+    if not SHARED_STATE:
+        ROW_EVENTS.publish(inv, update=True)
+
+async def submit(url: str, enrich_inline: bool = False, sem: Optional[asyncio.Semaphore] = None) -> tuple:
+    """정규화 → 판정 캐시 확인 → (없으면) 조사. (Investigation 또는 None, 새 기록인지)를 반환한다."""
+    canonical = canonicalize_url(url)
+    if canonical is None:
+        return None, False
+    inv = find_verdict(canonical)
+    if inv is not None:
+        record_hit(inv)
+        return inv, False
+
+    async def run() -> tuple:
+        # 앞선 실행이 기록까지 마친 뒤 취소되었으면 그 기록을 이어서 쓴다
+        existing = find_verdict(canonical)
+        if existing is not None:
+            return existing, False
+        new = analyze_url(url, canonical)
+        if new is None:
+            return None, False
+        record(new)
+        if enrich_inline:
+            try:
+                async with sem:
+                    await enrich(new)
+            except asyncio.CancelledError:
+                # 대량 조사 클라이언트가 끊겨도 이미 저장된 기록이 pending으로 남지 않게 백그라운드에서 마저 보강한다
+                if new.enrichment == "pending":
+                    schedule_enrichment(new)
+                raise
+        else:
+            schedule_enrichment(new)
+        return new, True
+
+    (inv, created), leader = await FLIGHTS.do(canonical, run)
+    is_new = leader and created
+    if inv is not None and not is_new:
+        record_hit(inv)
+    return inv, is_new
+
+@app.post("/investigate", response_class=HTMLResponse)
+async def investigate(url: str = Form(...)):
+    # 같은 URL이 이미 조사되었으면 기존 기록의 제출 횟수만 늘린다 (DNS/RDAP 보강은 백그라운드에서 진행)
+    inv, _ = await submit(url)
+    if inv is None:
+        return "<p class='text-red-600 text-sm'>유효한 URL이 아닙니다.</p>"
 
     html = f"""
     <div class="flex flex-col gap-6">
@@ -253,13 +1509,159 @@ async def investigate(url: str = Form(...)):
           <h2 class="text-lg font-semibold">최근 조사</h2>
           <button class="text-xs underline" hx-get="/recent" hx-target="#recent" hx-swap="innerHTML">새로고침</button>
         </div>
-        {render_recent_table(STORE)}
+        {render_recent_table(STORE.recent(), live=True)}
       </div>
-      {whois_html}
+      {render_whois_box(inv)}
     </div>
     """
     return html
 
+@app.get("/whois/{inv_id}", response_class=HTMLResponse)
+async def whois(inv_id: str):
+    inv = STORE.get(inv_id)
+    if inv is None:
+        return "<p class='text-red-600 text-sm'>조사 기록을 찾을 수 없습니다.</p>"
+    return render_whois_box(inv)
+
+# --- 대량 조사 (NDJSON 스트리밍) ---
+BATCH_CHUNK_SIZE = 200
+BATCH_ENRICH_CONCURRENCY = 16
+BATCH_SPOOL_SIZE = 1024 * 1024  # 이보다 큰 입력은 임시 파일로 내려 메모리 사용량을 일정하게 유지
+
+def _parse_batch_line(line: bytes) -> Optional[str]:
+    # 한 줄에 URL 하나, 또는 {"url": "..."} 형태의 JSON 한 줄
+    text = line.decode("utf-8", errors="replace").strip()
+    if not text:
+        return None
+    if text.startswith("{"):
+        try:
+            return str(json.loads(text).get("url") or "")
+        except (ValueError, AttributeError):
+            return text
+    return text
+
+def _batch_result(inv: Investigation) -> dict:
+    whois_data = inv.whois or {}
+    return {
+        "id": inv.id,
+        "url": inv.url,
+        "domain": inv.domain,
+        "score": inv.score,
+        "decision": inv.decision,
+        "enrichment": inv.enrichment,
+        "ip": inv.ip,
+        "asn": whois_data.get("asn"),
+    }
+
+async def _run_batch_chunk(urls: List[str], do_enrich: bool, sem: asyncio.Semaphore):
+    # 기록만 저장하고 테이블은 다시 그리지 않는다 (구독자에게는 행 단위로 푸시).
+    # 기록은 URL마다 submit()에서 따로 저장된다. 결과는 끝난 순서대로 내보내므로
+    # 느린 보강 하나가 청크 전체의 응답을 붙잡지 않는다 (각 결과에 url이 있어 순서는 필요 없다).
+    tasks = {asyncio.create_task(submit(url, do_enrich, sem)): url for url in urls}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                url = tasks[task]
+                inv, is_new = task.result()
+                if inv is None:
+                    yield {"url": url, "error": "invalid_url"}
+                else:
+                    yield {**_batch_result(inv), "url": url, "duplicate": not is_new}
+    finally:
+        # 클라이언트가 끊기면 남은 제출을 취소한다 (보강 중이던 기록은 submit()이 백그라운드로 넘긴다)
+        for task in pending:
+            task.cancel()
+
+@app.post("/investigate/batch")
+async def investigate_batch(request: Request, enrich_inline: bool = True):
+    """줄 단위 URL 목록(multipart 업로드 또는 text/JSONL 스트림 본문)을 받아 결과를 NDJSON으로 흘려보낸다.
+
+    enrich_inline=false 이면 DNS/RDAP 보강을 기다리지 않고 점수만 바로 반환한다.
+    """
+    # 응답 스트리밍 중에는 Starlette가 연결 종료 감지를 위해 receive()를 점유하므로,
+    # 요청 본문은 먼저 임시 파일로 흘려 받은 뒤 한 줄씩 처리한다.
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            return StreamingResponse(
+                iter([json.dumps({"error": "file field required"}) + "\n"]),
+                media_type="application/x-ndjson",
+                status_code=400,
+            )
+        source = upload.file
+    else:
+        source = tempfile.SpooledTemporaryFile(max_size=BATCH_SPOOL_SIZE)
+        async for chunk in request.stream():
+            source.write(chunk)
+    source.seek(0)
+
+    async def results():
+        sem = asyncio.Semaphore(BATCH_ENRICH_CONCURRENCY)
+        chunk: List[str] = []
+        try:
+            for line in source:
+                url = _parse_batch_line(line)
+                if url is None:
+                    continue
+                chunk.append(url)
+                if len(chunk) >= BATCH_CHUNK_SIZE:
+                    async for r in _run_batch_chunk(chunk, enrich_inline, sem):
+                        yield json.dumps(r, ensure_ascii=False) + "\n"
+                    chunk = []
+            if chunk:
+                async for r in _run_batch_chunk(chunk, enrich_inline, sem):
+                    yield json.dumps(r, ensure_ascii=False) + "\n"
+        finally:
+            source.close()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+# --- 클러스터 조회 ---
+@app.get("/clusters/{inv_id}")
+async def cluster(inv_id: str, limit: int = 100):
+    result = CLUSTERS.cluster_of(inv_id, limit=max(1, min(limit, 1000)))
+    if result is None:
+        return JSONResponse({"error": "not found"}, status_code=404)
+    return result
+
+@app.get("/clusters")
+async def cluster_by_feature(kind: str, value: str, limit: int = 100):
+    """kind: domain / ip / asn / net. 해당 특징을 공유하는 조사와 그 클러스터를 반환한다."""
+    inv_ids = CLUSTERS.postings(kind, value)
+    if not inv_ids:
+        return JSONResponse({"error": "not found"}, status_code=404)
+    limit = max(1, min(limit, 1000))
+    return {
+        "kind": kind,
+        "value": value,
+        "investigations": inv_ids[-limit:][::-1],
+        "cluster": CLUSTERS.cluster_of(inv_ids[-1], limit=limit),
+    }
+
+@app.post("/rules/reload")
+async def rules_reload():
+    global RULES_REV
+    try:
+        reload_rules()
+    except (OSError, ValueError) as e:
+        return {"ok": False, "error": str(e)}
+    if SHARED_STATE:
+        RULES_REV = STORE.bump_counter("rules")  # 다른 워커는 다음 폴링 주기에 따라 읽는다
+    return {"ok": True, "keywords": len(RULES.matcher.keywords), "suspicious_tlds": len(RULES.suspicious_tlds)}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {"dns": DNS_CACHE.stats(), "rdap": RDAP_CACHE.stats(), "verdict": VERDICTS.stats()}
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    workers = int(os.environ.get("PHISH_WORKERS", "1"))
+    if workers > 1:
+        # 워커 프로세스들이 같은 SQLite 파일로 조사 기록/캐시/보강 작업 큐를 공유한다
+        os.environ["PHISH_SHARED_STATE"] = "1"
+        uvicorn.run("Main:app", host="0.0.0.0", port=8000, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
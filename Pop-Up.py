@@ -1,9 +1,13 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.responses import HTMLResponse
 from urllib.parse import unquote
 from fastapi.middleware.cors import CORSMiddleware
+import os
+import metrics
+from templates import CachedBody, FragmentCache, Template, cached_response
 
 app = FastAPI(title="Phish Investigator — Popup Fragment")
+metrics.install(app, "popup")
 
 # CORS 허용 (Main:8000 → Popup:8001)
 app.add_middleware(
@@ -12,32 +16,47 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-) 
+)
 
-@app.get("/fragment", response_class=HTMLResponse)
-async def popup_fragment(url: str = "", score: str = "", decision: str = ""):
-    url = unquote(url)
-    score_int = int(score) if score.isdigit() else 0
+# --- 정적 자산 (한 번만 내려받고 브라우저가 캐시) ---
+POPUP_CSS = CachedBody(b"""
+@keyframes fadeOut {
+  0% { opacity: 1; }
+  100% { opacity: 0; }
+}
+.fade-out {
+  animation: fadeOut 0.3s ease forwards;
+}
+""")
 
-    # 색상 및 라벨 구분
-    if score_int >= 80:
-        color = "bg-red-100 text-red-800"
-        label = "🚨 위험"
-    else:
-        color = "bg-yellow-100 text-yellow-800"
-        label = "⚠️ 주의"
+POPUP_JS = CachedBody("""
+// 닫기 함수 (fade-out 애니메이션 후 제거)
+function closeModal() {
+  const modal = document.getElementById('popup-modal');
+  if (modal) {
+    modal.classList.add('fade-out');
+    setTimeout(() => modal.remove(), 300); // 0.3초 후 완전 제거
+  }
+}
+""".encode("utf-8"))
+
+ASSET_CACHE_CONTROL = "public, max-age=31536000, immutable"  # URL에 버전(?v=)이 붙으므로 영구 캐시
+FRAGMENT_CACHE_CONTROL = "public, max-age=3600"
+# 모달은 메인 페이지(8000)에 삽입되므로 자산은 절대 주소로 가리킨다.
+# 요청의 Host 헤더로 만들면 공개 캐시에 클라이언트가 고른 주소가 남으므로 설정값만 쓴다.
+ASSET_BASE = os.environ.get("POPUP_ASSET_BASE", "http://127.0.0.1:8001/").rstrip("/") + "/"
 
-    # 모달 HTML + fade-out 애니메이션 포함
-    return f"""
-    <style>
-      @keyframes fadeOut {{
-        0% {{ opacity: 1; }}
-        100% {{ opacity: 0; }}
-      }}
-      .fade-out {{
-        animation: fadeOut 0.3s ease forwards;
-      }}
-    </style>
+@app.get("/static/popup.css")
+async def popup_css(request: Request):
+    return cached_response(request, POPUP_CSS, "text/css; charset=utf-8", ASSET_CACHE_CONTROL)
+
+@app.get("/static/popup.js")
+async def popup_js(request: Request):
+    return cached_response(request, POPUP_JS, "application/javascript; charset=utf-8", ASSET_CACHE_CONTROL)
+
+# --- 모달 템플릿 ---
+POPUP_TEMPLATE = Template("""
+    <link rel="stylesheet" href="{css_url}">
 
     <div id="popup-modal" class="fixed inset-0 flex items-center justify-center z-50 transition-opacity duration-300">
       <!-- 배경 클릭 시 닫기 -->
@@ -53,7 +72,7 @@ async def popup_fragment(url: str = "", score: str = "", decision: str = ""):
         <div class="flex gap-2 justify-end">
           <a href="https://phishing.gov.kr" target="_blank"
              class="bg-red-600 text-white px-4 py-2 rounded-xl hover:bg-red-700">신고하기</a>
-          <button onclick="closeModal()" 
+          <button onclick="closeModal()"
                   class="bg-slate-200 px-4 py-2 rounded-xl hover:bg-slate-300">
             닫기
           </button>
@@ -61,17 +80,38 @@ async def popup_fragment(url: str = "", score: str = "", decision: str = ""):
       </div>
     </div>
 
-    <script>
-      // 닫기 함수 (fade-out 애니메이션 후 제거)
-      function closeModal() {{
-        const modal = document.getElementById('popup-modal');
-        if (modal) {{
-          modal.classList.add('fade-out');
-          setTimeout(() => modal.remove(), 300); // 0.3초 후 완전 제거
-        }}
-      }}
-    </script>
-    """
+    <script src="{js_url}"></script>
+    """)
+
+FRAGMENTS = FragmentCache(maxsize=1024)
+
+def render_popup(url: str, score: str) -> str:
+    score_int = int(score) if score.isdigit() else 0
+
+    # 색상 및 라벨 구분
+    if score_int >= 80:
+        color = "bg-red-100 text-red-800"
+        label = "🚨 위험"
+    else:
+        color = "bg-yellow-100 text-yellow-800"
+        label = "⚠️ 주의"
+
+    return POPUP_TEMPLATE.render(
+        css_url=f"{ASSET_BASE}static/popup.css?v={POPUP_CSS.etag[3:-1]}",
+        js_url=f"{ASSET_BASE}static/popup.js?v={POPUP_JS.etag[3:-1]}",
+        color=color,
+        label=label,
+        url=url,
+        score=score,
+    )
+
+@app.get("/fragment", response_class=HTMLResponse)
+@metrics.timed_function("popup_fragment")
+async def popup_fragment(request: Request, url: str = "", score: str = "", decision: str = ""):
+    # 출력은 (url, score)에만 의존하므로 렌더링 결과를 LRU에 두고 ETag로 재검증한다
+    url = unquote(url)
+    cached = FRAGMENTS.get_or_render((url, score), lambda: render_popup(url, score))
+    return cached_response(request, cached, "text/html; charset=utf-8", FRAGMENT_CACHE_CONTROL)
 
 
 if __name__ == "__main__":
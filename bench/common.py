@@ -0,0 +1,67 @@
+"""벤치마크 공통: 환경 정보, 백분위 계산, JSON 결과 저장."""
+from datetime import datetime, timezone
+from typing import List
+import json
+import os
+import platform
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "bench", "results")
+
+
+def isolate_state() -> None:
+    # 벤치마크가 작업 디렉터리의 캐시/저장소 SQLite 파일을 건드리지 않도록 메모리 모드로 띄운다
+    os.environ.setdefault("PHISH_CACHE_DB", "")
+    os.environ.setdefault("PHISH_STORE_DB", "")
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def latency_summary(samples: List[float], scale: float = 1000.0) -> dict:
+    """초 단위 샘플을 받아 scale 배(기본 ms)한 평균/p50/p95/p99/최대를 돌려준다."""
+    values = sorted(samples)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) * scale,
+        "p50": percentile(values, 50) * scale,
+        "p95": percentile(values, 95) * scale,
+        "p99": percentile(values, 99) * scale,
+        "max": values[-1] * scale,
+    }
+
+
+def env_info() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "commit": commit,
+    }
+
+
+def write_json(kind: str, payload: dict, out: str = "") -> str:
+    if not out:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        out = os.path.join(RESULTS_DIR, f"{kind}-{stamp}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"kind": kind, **env_info(), **payload}, f, ensure_ascii=False, indent=2)
+    return out
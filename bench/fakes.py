@@ -0,0 +1,83 @@
+"""벤치마크용 로컬 대역: 지연을 조절할 수 있는 가짜 DNS 리졸버와 가짜 RDAP HTTP 서버."""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import hashlib
+import json
+import threading
+import time
+import urllib.request
+
+
+def fake_ip(domain: str) -> str:
+    # 도메인마다 항상 같은 사설 IP를 돌려준다
+    h = hashlib.blake2b(domain.encode(), digest_size=3).digest()
+    return f"10.{h[0]}.{h[1]}.{h[2]}"
+
+
+def make_resolver(latency: float):
+    def resolve_domain(domain: str) -> str:
+        if latency:
+            time.sleep(latency)
+        return fake_ip(domain)
+    return resolve_domain
+
+
+class FakeRdapServer:
+    """GET /ip/<addr> 에 ipwhois.lookup_rdap() 결과와 같은 모양의 JSON을 돌려주는 HTTP 서버."""
+
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        latency_s = latency
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                ip_addr = self.path.rsplit("/", 1)[-1]
+                if latency_s:
+                    time.sleep(latency_s)
+                octets = ip_addr.split(".")
+                body = json.dumps({
+                    "asn": str(64512 + int(octets[1]) if len(octets) == 4 else 64512),
+                    "asn_cidr": f"{'.'.join(octets[:3])}.0/24" if len(octets) == 4 else "",
+                    "network": {
+                        "name": "FAKE-NET",
+                        "country": "KR",
+                        "handle": f"NET-{'-'.join(octets[:3])}",
+                        "cidr": f"{'.'.join(octets[:3])}.0/24" if len(octets) == 4 else "",
+                    },
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeRdapServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def make_rdap_client(base_url: str, timeout: float = 10.0):
+    def lookup_rdap(ip_addr: str) -> dict:
+        with urllib.request.urlopen(f"{base_url}/ip/{ip_addr}", timeout=timeout) as resp:
+            return json.loads(resp.read())
+    return lookup_rdap
+
+
+def install(main_module, dns_latency: float, rdap_url: str) -> None:
+    """Main 모듈의 실제 DNS/RDAP 호출을 로컬 대역으로 바꾼다."""
+    main_module.resolve_domain = make_resolver(dns_latency)
+    main_module.lookup_rdap = make_rdap_client(rdap_url)
@@ -0,0 +1,167 @@
+"""두 FastAPI 앱에 대한 종단 간 비동기 부하 테스트 (DNS/RDAP는 로컬 대역 사용).
+
+    python -m bench.load [--duration 10] [--concurrency 32] [--dns-latency 0.02] [--rdap-latency 0.2] [--out load.json]
+
+시나리오별 처리량(req/s)과 p50/p95/p99 지연(ms)을 출력하고 JSON으로 저장한다. httpx가 필요하다.
+"""
+from typing import Callable, List
+import argparse
+import asyncio
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from bench.common import ROOT, latency_summary, write_json
+from bench.fakes import FakeRdapServer
+
+BRAND_WORDS = ["login", "verify", "kbstar", "naver", "wallet", "docs", "news", "shop"]
+TLDS = ["com", "xyz", "co.kr", "tk", "net"]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(target: str, port: int, extra: List[str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "bench.serve", target, "--port", str(port), *extra],
+        cwd=ROOT,
+    )
+
+
+async def wait_ready(base_url: str, proc: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if proc.poll() is not None:
+                raise RuntimeError(f"{base_url} 서버가 종료됨 (exit {proc.returncode})")
+            try:
+                if (await client.get(f"{base_url}/metrics")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"{base_url} 서버가 {timeout}초 안에 뜨지 않음")
+
+
+def url_pool(n_domains: int, seed: int = 7) -> List[str]:
+    # 실제 캠페인처럼 소수 도메인이 여러 경로로 반복되도록 만든다
+    rng = random.Random(seed)
+    domains = [f"{rng.choice(BRAND_WORDS)}-{i}.example.{rng.choice(TLDS)}" for i in range(n_domains)]
+    return [f"https://{rng.choice(['', 'www.', 'secure.account.'])}{rng.choice(domains)}/"
+            f"{rng.choice(BRAND_WORDS)}?id={rng.randint(0, 9999)}" for _ in range(n_domains * 20)]
+
+
+async def run_scenario(name: str, make_request: Callable, duration: float, concurrency: int) -> dict:
+    samples: List[float] = []
+    errors = 0
+    statuses: dict = {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker(seed: int) -> None:
+            nonlocal errors
+            rng = random.Random(seed)
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    resp = await make_request(client, rng)
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                samples.append(time.perf_counter() - start)
+                statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+                if resp.status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    result = {
+        "name": name,
+        "duration_s": elapsed,
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "errors": errors,
+        "status_codes": {str(k): v for k, v in sorted(statuses.items())},
+        "throughput_rps": len(samples) / elapsed if elapsed else 0.0,
+        "latency_ms": latency_summary(samples),
+    }
+    lat = result["latency_ms"]
+    print(f"{name:<24} {result['throughput_rps']:>9.1f} req/s  p50 {lat.get('p50', 0):>7.2f}  "
+          f"p95 {lat.get('p95', 0):>7.2f}  p99 {lat.get('p99', 0):>7.2f} ms  errors {errors}")
+    return result
+
+
+async def run(args) -> dict:
+    rdap = FakeRdapServer(latency=args.rdap_latency).start()
+    main_port, popup_port = free_port(), free_port()
+    procs = [
+        start_server("main", main_port, ["--dns-latency", str(args.dns_latency), "--rdap-url", rdap.url]),
+        start_server("popup", popup_port, []),
+    ]
+    main_url, popup_url = f"http://127.0.0.1:{main_port}", f"http://127.0.0.1:{popup_port}"
+    urls = url_pool(args.domains)
+    try:
+        await wait_ready(main_url, procs[0])
+        await wait_ready(popup_url, procs[1])
+
+        async def investigate(client, rng):
+            return await client.post(f"{main_url}/investigate", data={"url": rng.choice(urls)})
+
+        async def recent(client, rng):
+            return await client.get(f"{main_url}/recent")
+
+        async def fragment(client, rng):
+            return await client.get(f"{popup_url}/fragment", params={
+                "url": rng.choice(urls), "score": str(rng.choice([30, 65, 90])), "decision": "내부 차단"})
+
+        scenarios = [("main:investigate", investigate), ("main:recent", recent), ("popup:fragment", fragment)]
+        results = []
+        for name, fn in scenarios:
+            results.append(await run_scenario(name, fn, args.duration, args.concurrency))
+        return {
+            "config": {
+                "duration_s": args.duration,
+                "concurrency": args.concurrency,
+                "dns_latency_s": args.dns_latency,
+                "rdap_latency_s": args.rdap_latency,
+                "domains": args.domains,
+            },
+            "results": results,
+        }
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        rdap.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10.0, help="시나리오별 측정 시간(초)")
+    parser.add_argument("--concurrency", type=int, default=32, help="동시 클라이언트 수")
+    parser.add_argument("--dns-latency", type=float, default=0.02, help="가짜 리졸버 지연(초)")
+    parser.add_argument("--rdap-latency", type=float, default=0.2, help="가짜 RDAP 서버 지연(초)")
+    parser.add_argument("--domains", type=int, default=200, help="URL 풀을 만들 도메인 수")
+    parser.add_argument("--out", default="", help="결과 JSON 경로 (기본: bench/results/load-*.json)")
+    args = parser.parse_args()
+    payload = asyncio.run(run(args))
+    print(f"결과 저장: {write_json('load', payload, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""마이크로벤치마크: heuristic_score, decision_from_score, render_recent_table, popup_fragment.
+
+    python -m bench.micro [--min-time 0.5] [--sizes 20,1000,100000] [--out results.json]
+"""
+from datetime import datetime, timedelta
+import argparse
+import importlib
+import random
+import time
+
+from starlette.requests import Request
+
+from bench.common import isolate_state, latency_summary, write_json
+
+isolate_state()
+import Main  # noqa: E402
+
+SAMPLE_URLS = [
+    "https://login.microsoft.secure-verify.example.xyz/account/update?session=1&id=2&t=3&u=4",
+    "https://www.naver.com/",
+    "http://kbstar-bank.signin.example.tk/password",
+    "https://docs.python.org/3/library/asyncio.html",
+    "https://paypa1.example.com/%40wallet/billing",
+    "https://a.b.c.example.co.kr/onedrive/invoice",
+]
+
+
+def run_sync(coro):
+    # 내부에서 await 하지 않는 코루틴을 이벤트 루프 없이 실행한다
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("coroutine suspended")
+
+
+def bench(name: str, fn, min_time: float, **meta) -> dict:
+    fn()  # 예열
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    summary = latency_summary(samples, scale=1e6)
+    result = {"name": name, "unit": "us", **meta, **summary,
+              "ops_per_s": len(samples) / sum(samples) if samples else 0.0}
+    print(f"{name:<40} {summary['p50']:>10.2f} us p50  {summary['p99']:>10.2f} us p99  ({summary['count']} runs)")
+    return result
+
+
+def make_investigations(n: int):
+    rng = random.Random(n)
+    base = datetime.now()
+    items = []
+    for i in range(n):
+        url = rng.choice(SAMPLE_URLS) + f"&n={i}"
+        score = rng.randint(0, 100)
+        items.append(Main.Investigation(
+            id=f"inv-{i}",
+            url=url,
+            domain=f"site{i % 500}.example.com",
+            submitted_at=base - timedelta(seconds=n - i),
+            status="analyzed",
+            score=score,
+            decision=Main.decision_from_score(score),
+            ip=f"10.0.{i % 256}.{i % 200}",
+            enrichment="enriched",
+        ))
+    return items
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-time", type=float, default=0.5, help="벤치마크별 최소 측정 시간(초)")
+    parser.add_argument("--sizes", default="20,1000,100000", help="render_recent_table 저장 건수")
+    parser.add_argument("--out", default="", help="결과 JSON 경로 (기본: bench/results/micro-*.json)")
+    args = parser.parse_args()
+
+    results = []
+    exts = {u: Main.TLD_EXTRACT(u) for u in SAMPLE_URLS}
+    score_raw = Main.heuristic_score.__wrapped__
+    for i, url in enumerate(SAMPLE_URLS):
+        results.append(bench(f"heuristic_score[{i}]", lambda u=url: score_raw(u, exts[u]), args.min_time, url=url))
+    results.append(bench("heuristic_score[with extract]", lambda: score_raw(SAMPLE_URLS[0]), args.min_time))
+    results.append(bench("decision_from_score", lambda: [Main.decision_from_score(s) for s in (10, 60, 90)],
+                         args.min_time, calls_per_op=3))
+
+    render_raw = Main.render_recent_table.__wrapped__
+    for size in (int(s) for s in args.sizes.split(",") if s):
+        items = make_investigations(size)
+
+        def render_cold(items=items):
+            Main._ROW_CACHE.clear()
+            render_raw(items)
+
+        results.append(bench(f"render_recent_table[n={size},cold]", render_cold, args.min_time, store_size=size))
+        results.append(bench(f"render_recent_table[n={size},warm]", lambda items=items: render_raw(items),
+                             args.min_time, store_size=size))
+
+        store = Main.InvestigationStore(db_path="")
+        for inv in items:
+            store.add(inv)
+        results.append(bench(f"recent_page[n={size}]", lambda store=store: render_raw(store.recent()),
+                             args.min_time, store_size=size))
+        results.append(bench(f"recent_page[n={size},min_score=80]",
+                             lambda store=store: render_raw(store.query(limit=20, min_score=80)[0]),
+                             args.min_time, store_size=size))
+
+    popup = importlib.import_module("Pop-Up")
+    fragment_raw = popup.popup_fragment.__wrapped__
+    request = Request({
+        "type": "http", "method": "GET", "path": "/fragment", "root_path": "", "scheme": "http",
+        "server": ("127.0.0.1", 8001), "query_string": b"", "headers": [(b"accept-encoding", b"gzip")],
+    })
+    for score in ("35", "92"):
+        def fragment_cold(score=score):
+            popup.FRAGMENTS._data.clear()
+            run_sync(fragment_raw(request, url=SAMPLE_URLS[0], score=score, decision="내부 차단"))
+
+        results.append(bench(f"popup_fragment[score={score},cold]", fragment_cold, args.min_time))
+        results.append(bench(
+            f"popup_fragment[score={score},cached]",
+            lambda score=score: run_sync(fragment_raw(request, url=SAMPLE_URLS[0], score=score, decision="내부 차단")),
+            args.min_time,
+        ))
+
+    path = write_json("micro", {"min_time": args.min_time, "results": results}, args.out)
+    print(f"결과 저장: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""부하 테스트용 서버 실행기. main 앱은 DNS/RDAP를 로컬 대역으로 바꿔 띄운다.
+
+    python -m bench.serve main --port 18000 --dns-latency 0.02 --rdap-url http://127.0.0.1:18100
+    python -m bench.serve popup --port 18001
+"""
+import argparse
+import importlib
+
+from bench import fakes
+from bench.common import isolate_state
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("target", choices=["main", "popup"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--dns-latency", type=float, default=0.0, help="가짜 리졸버 응답 지연(초)")
+    parser.add_argument("--rdap-url", default="", help="가짜 RDAP 서버 주소")
+    args = parser.parse_args()
+
+    isolate_state()
+    import uvicorn
+
+    if args.target == "main":
+        module = importlib.import_module("Main")
+        fakes.install(module, args.dns_latency, args.rdap_url)
+    else:
+        module = importlib.import_module("Pop-Up")
+    uvicorn.run(module.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
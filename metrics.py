@@ -0,0 +1,217 @@
+"""Main / Pop-Up 공용 단계별 지연 시간 계측.
+
+- timed("stage") / @timed_function("stage") 로 단계 시간을 히스토그램에 누적
+- install(app, "main") 으로 /metrics(Prometheus 텍스트 포맷)와 Server-Timing 헤더를 붙인다
+- PHISH_PROFILER=1 이면 /debug/profile/* 샘플링 프로파일러 엔드포인트를 연다
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import functools
+import os
+import sys
+import threading
+import time
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROFILER_ENABLED = os.environ.get("PHISH_PROFILER", "") == "1"
+
+# 요청마다 [(stage, seconds), ...] 를 모아 Server-Timing 헤더로 내보낸다
+_REQUEST_TIMINGS: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 마지막 칸은 +Inf
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        idx = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[idx] += 1
+            self.total += seconds
+            self.count += 1
+
+
+_HISTOGRAMS: Dict[str, Histogram] = {}
+_APP_NAME = "phish"
+
+
+def observe(stage: str, seconds: float) -> None:
+    hist = _HISTOGRAMS.get(stage)
+    if hist is None:
+        hist = _HISTOGRAMS.setdefault(stage, Histogram())
+    hist.observe(seconds)
+    timings = _REQUEST_TIMINGS.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+@contextmanager
+def timed(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start)
+
+
+def timed_function(stage: str):
+    """동기/비동기 함수 모두에 쓸 수 있는 계측 데코레이터."""
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    observe(stage, time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(stage, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def render_prometheus() -> str:
+    lines = [
+        "# HELP phish_stage_seconds Latency of each processing stage.",
+        "# TYPE phish_stage_seconds histogram",
+    ]
+    for stage, hist in sorted(_HISTOGRAMS.items()):
+        with hist._lock:
+            counts = list(hist.counts)
+            total, count = hist.total, hist.count
+        labels = f'app="{_APP_NAME}",stage="{stage}"'
+        cumulative = 0
+        for le, c in zip(hist.buckets, counts):
+            cumulative += c
+            lines.append(f'phish_stage_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f'phish_stage_seconds_bucket{{{labels},le="+Inf"}} {count}')
+        lines.append(f"phish_stage_seconds_sum{{{labels}}} {total}")
+        lines.append(f"phish_stage_seconds_count{{{labels}}} {count}")
+    return "\n".join(lines) + "\n"
+
+
+class ServerTimingMiddleware:
+    """요청 안에서 기록된 단계 시간을 Server-Timing 헤더로 붙이는 ASGI 미들웨어."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings: List[Tuple[str, float]] = []
+        token = _REQUEST_TIMINGS.set(timings)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                merged: Dict[str, float] = {}
+                for stage, seconds in timings:
+                    merged[stage] = merged.get(stage, 0.0) + seconds
+                merged["total"] = time.perf_counter() - start
+                value = ", ".join(f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in merged.items())
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", value.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _REQUEST_TIMINGS.reset(token)
+
+
+# --- 샘플링 프로파일러 ---
+class SamplingProfiler:
+    """interval 마다 모든 스레드의 스택을 떠서 collapsed-stack 형식으로 집계한다."""
+
+    def __init__(self):
+        self.samples: Dict[str, int] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float = 0.005) -> None:
+        if self.running:
+            return
+        self.samples = {}
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+
+    def _run(self, interval: float) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack = ";".join(reversed(names))
+                with self._lock:
+                    self.samples[stack] = self.samples.get(stack, 0) + 1
+
+    def collapsed(self) -> str:
+        with self._lock:
+            items = sorted(self.samples.items(), key=lambda kv: -kv[1])
+        return "\n".join(f"{stack} {n}" for stack, n in items)
+
+
+PROFILER = SamplingProfiler()
+
+
+def install(app, name: str) -> None:
+    """FastAPI 앱에 Server-Timing 미들웨어와 /metrics (및 선택적 프로파일러) 엔드포인트를 붙인다."""
+    from fastapi.responses import PlainTextResponse
+
+    global _APP_NAME
+    _APP_NAME = name
+    app.add_middleware(ServerTimingMiddleware)
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+    if not PROFILER_ENABLED:
+        return
+
+    @app.post("/debug/profile/start")
+    async def profile_start(interval: float = 0.005):
+        PROFILER.start(max(interval, 0.001))
+        return {"running": True}
+
+    @app.post("/debug/profile/stop", response_class=PlainTextResponse)
+    async def profile_stop():
+        PROFILER.stop()
+        return PROFILER.collapsed()
+
+    @app.get("/debug/profile", response_class=PlainTextResponse)
+    async def profile_dump():
+        return PROFILER.collapsed()
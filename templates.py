@@ -0,0 +1,136 @@
+"""Main / Pop-Up 공용 HTML 템플릿과 응답 캐시 유틸리티.
+
+- Template: "{name}" 자리표시자를 미리 쪼개 두고 렌더링 때는 join만 한다. 값은 기본적으로 HTML 이스케이프하며,
+  이미 렌더링된 HTML 조각은 Raw(...)로 감싸 그대로 넣는다.
+- etag_matches: If-None-Match 목록(쉼표 구분, *, 약한 비교) 확인
+- negotiate_encoding / compress: Accept-Encoding의 q 값에 따라 br(brotli 설치 시) 또는 gzip 선택
+- FragmentCache: 렌더링 결과(본문, ETag, 압축본)를 담는 작은 LRU
+"""
+from collections import OrderedDict
+from string import Formatter
+from typing import Dict, Optional, Tuple
+import gzip
+import hashlib
+import html
+
+try:
+    import brotli
+except ImportError:  # brotli는 선택 의존성
+    brotli = None
+
+COMPRESS_MIN_SIZE = 256
+
+
+class Raw(str):
+    """이스케이프하지 않고 그대로 넣을 HTML 조각."""
+
+
+class Template:
+    def __init__(self, source: str):
+        self._parts: Tuple[Tuple[str, Optional[str]], ...] = tuple(
+            (literal, field) for literal, field, _, _ in Formatter().parse(source)
+        )
+        self.fields = frozenset(field for _, field in self._parts if field)
+
+    def render(self, **values) -> str:
+        out = []
+        for literal, field in self._parts:
+            out.append(literal)
+            if field is not None:
+                value = values[field]
+                out.append(value if isinstance(value, Raw) else html.escape(str(value)))
+        return "".join(out)
+
+
+def etag_for(body: bytes) -> str:
+    return 'W/"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag  # If-None-Match는 약한 비교
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == opaque:
+            return True
+    return False
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip()] = q
+    best, best_q = None, 0.0
+    for name in ("br", "gzip"):  # q가 같으면 br 우선
+        if name == "br" and brotli is None:
+            continue
+        q = accepted.get(name, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+class CachedBody:
+    """본문 한 벌과 ETag, 인코딩별 압축본."""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = etag_for(body)
+        self._encoded: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        if encoding is None or len(self.body) < COMPRESS_MIN_SIZE:
+            return self.body, None
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = self._encoded[encoding] = compress(self.body, encoding)
+        return data, encoding
+
+
+class FragmentCache:
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[tuple, CachedBody]" = OrderedDict()
+
+    def get_or_render(self, key: tuple, render) -> CachedBody:
+        cached = self._data.get(key)
+        if cached is not None:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return cached
+        self.misses += 1
+        cached = self._data[key] = CachedBody(render().encode("utf-8"))
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return cached
+
+
+def cached_response(request, cached: CachedBody, media_type: str, cache_control: str):
+    """If-None-Match가 맞으면 304, 아니면 협상된 인코딩으로 본문을 돌려준다."""
+    from fastapi.responses import Response
+
+    headers = {"ETag": cached.etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match", ""), cached.etag):
+        return Response(status_code=304, headers=headers)
+    body, encoding = cached.encoded(negotiate_encoding(request.headers.get("accept-encoding", "")))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
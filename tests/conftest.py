@@ -0,0 +1,39 @@
+"""테스트 공통 설정: 작업 디렉터리의 SQLite 파일을 건드리지 않도록 메모리 모드로 Main을 불러온다."""
+import datetime
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ["PHISH_STORE_DB"] = ""
+os.environ["PHISH_CACHE_DB"] = ""
+os.environ.pop("PHISH_SHARED_STATE", None)
+os.environ.pop("PHISH_RULES_FILE", None)
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import pytest  # noqa: E402
+
+import Main  # noqa: E402
+
+
+def make_inv(i: int, **fields) -> Main.Investigation:
+    values = {
+        "id": f"inv-{i}",
+        "url": f"https://site{i}.example.com/",
+        "domain": f"site{i}.com",
+        "submitted_at": datetime.datetime(2025, 1, 1) + datetime.timedelta(minutes=i),
+        "status": "analyzed",
+        "score": 0,
+    }
+    values.update(fields)
+    values.setdefault("decision", Main.decision_from_score(values["score"]))
+    return Main.Investigation(**values)
+
+
+def make_store(db_path: str, capacity: int = 3, shared: bool = False) -> Main.InvestigationStore:
+    return Main.InvestigationStore(capacity=capacity, db_path=db_path, shared=shared)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "store.sqlite3")
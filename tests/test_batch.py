@@ -0,0 +1,31 @@
+import asyncio
+
+from conftest import make_inv
+
+import Main
+
+
+def test_chunk_results_stream_as_each_submission_finishes(monkeypatch):
+    cancelled = []
+
+    async def fake_submit(url, do_enrich, sem):
+        try:
+            await asyncio.sleep(10 if url == "slow" else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(url)
+            raise
+        return (None, False) if url == "bad" else (make_inv(0, url=url), True)
+
+    monkeypatch.setattr(Main, "submit", fake_submit)
+
+    async def scenario():
+        gen = Main._run_batch_chunk(["slow", "fast", "bad"], False, asyncio.Semaphore(1))
+        first = [await gen.__anext__(), await gen.__anext__()]
+        await gen.aclose()   # 클라이언트가 끊긴 경우
+        await asyncio.sleep(0)
+        return first
+
+    first = asyncio.run(scenario())
+    assert sorted(r["url"] for r in first) == ["bad", "fast"]
+    assert {"url": "bad", "error": "invalid_url"} in first
+    assert cancelled == ["slow"]
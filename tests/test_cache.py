@@ -0,0 +1,34 @@
+import Main
+
+
+def make_cache(path, read_through=False):
+    return Main.TTLCache("dns", 100, ttl=60, negative_ttl=5, db_path=str(path), read_through=read_through)
+
+
+def test_flushed_entries_survive_a_restart(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    cache = make_cache(path)
+    for i in range(50):
+        cache.put(f"site{i}.com", f"10.0.0.{i}")
+    cache.put("bad.com", "NXDOMAIN", error=True)
+    cache.flush()
+    reloaded = make_cache(path)
+    assert reloaded.get("site49.com") == ("10.0.0.49", False)
+    assert reloaded.get("bad.com") == ("NXDOMAIN", True)
+
+
+def test_disk_read_through_only_when_shared(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    local, shared = make_cache(path), make_cache(path, read_through=True)
+    other = make_cache(path)   # 다른 워커 프로세스
+    other.put("example.com", "10.0.0.1")
+    other.flush()
+    assert local.get("example.com") is None
+    assert shared.get("example.com") == ("10.0.0.1", False)
+
+
+def test_memory_only_cache_flush_is_a_no_op():
+    cache = Main.TTLCache("verdict", 10, ttl=60, negative_ttl=0)
+    cache.put("k", "v")
+    cache.flush()
+    assert cache.get("k") == ("v", False)
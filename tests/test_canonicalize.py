@@ -0,0 +1,59 @@
+import pytest
+
+import Main
+
+
+@pytest.mark.parametrize("a, b", [
+    ("HTTPS://Example.COM/a", "https://example.com/a"),
+    ("https://example.com:443/a", "https://example.com/a"),
+    ("http://example.com:80/", "http://example.com"),
+    ("https://example.com/a/", "https://example.com/a"),
+    ("https://example.com/?b=2&a=1", "https://example.com/?a=1&b=2"),
+    ("https://example.com/a%2fb", "https://example.com/a%2Fb"),
+    ("https://example.com./a", "https://example.com/a"),
+])
+def test_equivalent_urls_share_a_key(a, b):
+    assert Main.canonicalize_url(a) == Main.canonicalize_url(b)
+
+
+@pytest.mark.parametrize("a, b", [
+    ("https://example.com/a%2Fb", "https://example.com/a/b"),
+    ("https://example.com/%6Cogin", "https://example.com/login"),
+    ("https://example.com/#login", "https://example.com/"),
+    ("https://example.com/?q=%26", "https://example.com/?q=&"),
+    ("https://example.com:8443/", "https://example.com/"),
+    ("https://user@example.com/", "https://example.com/"),
+    ("https://example.com/A", "https://example.com/a"),
+])
+def test_distinct_urls_keep_distinct_keys(a, b):
+    assert Main.canonicalize_url(a) != Main.canonicalize_url(b)
+
+
+def test_unencoded_characters_are_kept():
+    assert Main.canonicalize_url("https://ex.com/p ath/한?q=a b#f g") == "https://ex.com/p ath/한?q=a b#f g"
+
+
+@pytest.mark.parametrize("raw, escaped", [
+    ("https://ex.com/한", "https://ex.com/%ED%95%9C"),
+    ("https://ex.com/?q=a b", "https://ex.com/?q=a%20b"),
+])
+def test_unencoded_and_escaped_forms_stay_distinct(raw, escaped):
+    # 점수가 다를 수 있으므로 ([@%] 규칙) 서로의 판정을 재사용하면 안 된다
+    assert Main.heuristic_score(raw) != Main.heuristic_score(escaped)
+    assert Main.canonicalize_url(raw) != Main.canonicalize_url(escaped)
+
+
+@pytest.mark.parametrize("url", ["", "example.com/login", "https://", "http://[::1/", "https://ex.com:99999/"])
+def test_invalid_urls(url):
+    assert Main.canonicalize_url(url) is None
+
+
+@pytest.mark.parametrize("url, score", [
+    ("https://example.com/#login-verify-microsoft", 26),
+    ("https://example.com/x#victim@corp.com", 12),
+    ("https://example.com/a%2Fb", 12),
+])
+def test_scoring_uses_submitted_url(url, score):
+    inv = Main.analyze_url(url, Main.canonicalize_url(url))
+    assert inv.score == score
+    assert inv.url == url
@@ -0,0 +1,108 @@
+import asyncio
+
+from conftest import make_inv
+
+import Main
+
+
+def enriched(i, domain, ip=None, asn=None, net=None):
+    return make_inv(i, domain=domain, ip=ip, asn=asn, network_handle=net)
+
+
+def build(*invs):
+    index = Main.ClusterIndex()
+    for inv in invs:
+        index.add(inv)
+        index.add_enrichment(inv)
+    return index
+
+
+def test_shared_ip_and_domain_merge_clusters():
+    index = build(
+        enriched(0, "a.com", ip="10.0.0.1"),
+        enriched(1, "b.com", ip="10.0.0.1"),
+        enriched(2, "b.com", ip="10.0.0.2"),
+        enriched(3, "c.com", ip="10.0.0.3"),
+    )
+    cluster = index.cluster_of("inv-0")
+    assert sorted(cluster["members"]) == ["inv-0", "inv-1", "inv-2"]
+    assert cluster["size"] == 3
+    assert index.cluster_of("inv-2")["cluster_id"] == cluster["cluster_id"]
+    assert index.cluster_of("inv-3")["members"] == ["inv-3"]
+    assert index.cluster_of("missing") is None
+
+
+def test_asn_is_indexed_but_does_not_merge():
+    index = build(enriched(0, "a.com", asn="13335"), enriched(1, "b.com", asn="13335"))
+    assert index.postings("asn", "13335") == ["inv-0", "inv-1"]
+    assert index.cluster_of("inv-0")["members"] == ["inv-0"]
+
+
+def test_incremental_enrichment_merges_existing_clusters():
+    a, b = make_inv(0, domain="a.com"), make_inv(1, domain="b.com")
+    index = build(a, b)
+    a.network_handle = b.network_handle = "NET-1"
+    index.add_enrichment(a)
+    index.add_enrichment(b)
+    index.add_enrichment(b)  # 같은 특징을 다시 보내도 중복되지 않는다
+    assert index.cluster_of("inv-1")["size"] == 2
+    assert index.postings("net", "NET-1") == ["inv-0", "inv-1"]
+
+
+def test_cluster_of_limits_members():
+    index = build(*(enriched(i, "same.com") for i in range(50)))
+    cluster = index.cluster_of("inv-0", limit=10)
+    assert cluster["size"] == 50
+    assert len(cluster["members"]) == 10
+
+
+def test_index_rebuilds_from_newest_rows_when_full(db_path, monkeypatch):
+    store = Main.InvestigationStore(capacity=5, db_path=db_path)
+    monkeypatch.setattr(Main, "STORE", store)
+    monkeypatch.setattr(Main, "CLUSTER_CAPACITY", 10)
+    monkeypatch.setattr(Main, "CLUSTERS", Main.ClusterIndex())
+
+    async def scenario():
+        for i in range(25):
+            inv = make_inv(i, domain=f"d{i % 2}.com")
+            store.add(inv)
+            Main.index_cluster(inv)
+            await asyncio.sleep(0.01)  # 스레드에서 만든 새 인덱스로 교체될 시간
+        while Main._CLUSTER_REPLAY is not None:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert len(Main.CLUSTERS) <= 10
+    assert "inv-24" in Main.CLUSTERS.cluster_of("inv-22")["members"]
+    assert Main.CLUSTERS.cluster_of("inv-0") is None
+
+
+def test_rebuild_keeps_rows_added_while_it_runs(db_path, monkeypatch):
+    store = Main.InvestigationStore(capacity=5, db_path=db_path)
+    monkeypatch.setattr(Main, "STORE", store)
+    monkeypatch.setattr(Main, "CLUSTER_CAPACITY", 4)
+    monkeypatch.setattr(Main, "CLUSTERS", Main.ClusterIndex())
+
+    async def scenario():
+        for i in range(5):
+            inv = make_inv(i, domain="same.com")
+            store.add(inv)
+            Main.index_cluster(inv)  # 다섯 번째에서 재구성이 시작된다
+        late = make_inv(5, domain="same.com")  # 새 인덱스가 DB를 읽기 전/후 어느 쪽이든 빠지면 안 된다
+        store.add(late)
+        Main.index_cluster(late)
+        while Main._CLUSTER_REPLAY is not None:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert "inv-5" in Main.CLUSTERS.cluster_of("inv-5")["members"]
+    assert Main.CLUSTERS.cluster_of("inv-0") is None
+
+
+def test_cluster_of_walks_members_and_features_separately():
+    index = build(*(enriched(i, "pop.com", ip=f"10.0.0.{i % 3}") for i in range(30)))
+    cluster = index.cluster_of("inv-7", limit=2)
+    assert len(cluster["members"]) == 2
+    assert all(m.startswith("inv-") for m in cluster["members"])
+    assert len(cluster["features"]) == 2
+    assert len(index.cluster_of("inv-7", limit=10)["features"]) == 4
@@ -0,0 +1,58 @@
+import asyncio
+import threading
+
+from conftest import make_inv, make_store
+
+import Main
+
+
+def test_queued_timeout_is_not_negative_cached(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(Main, "RDAP_TIMEOUT", 0.1)
+    monkeypatch.setattr(Main, "lookup_rdap", lambda ip: release.wait(2) and {})
+    monkeypatch.setattr(Main, "resolve_domain", lambda domain: "10.0.0.1")
+    monkeypatch.setattr(Main, "RDAP_CACHE", Main.TTLCache("rdap", 100, ttl=60, negative_ttl=60))
+    monkeypatch.setattr(Main, "DNS_CACHE", Main.TTLCache("dns", 100, ttl=60, negative_ttl=60))
+
+    async def scenario():
+        slow = [asyncio.create_task(Main.cached_rdap(f"192.0.2.{i}")) for i in range(Main.ENRICH_WORKERS + 2)]
+        await asyncio.sleep(0.01)
+        ip_addr = await Main.cached_resolve("healthy.example")  # RDAP 풀이 가득 차도 DNS는 막히지 않는다
+        results = await asyncio.gather(*slow, return_exceptions=True)
+        release.set()
+        return ip_addr, results
+
+    ip_addr, results = asyncio.run(scenario())
+    assert ip_addr == "10.0.0.1"
+    busy = [i for i, r in enumerate(results) if isinstance(r, Main.StageBusy)]
+    assert len(busy) == 2
+    for i, r in enumerate(results):
+        cached = Main.RDAP_CACHE.get(f"ip:192.0.2.{i}")
+        assert (cached is None) == (i in busy)
+
+
+def test_pending_rows_are_enriched_after_a_restart(db_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    before = make_store(db_path)
+    before.add(make_inv(0, enrichment="pending"))
+    before.add(make_inv(1, enrichment="enriched"))
+    before.add(make_inv(2, enrichment="pending"))
+    # 프로세스가 보강 도중 종료된 뒤 다시 시작한다
+    store = make_store(db_path)
+    assert [inv.id for inv in store.pending()] == ["inv-0", "inv-2"]
+
+    enriched = []
+
+    async def fake_enrich(inv):
+        enriched.append(inv.id)
+        inv.enrichment = "enriched"
+        store.update_enrichment(inv)
+
+    monkeypatch.setattr(Main, "STORE", store)
+    monkeypatch.setattr(Main, "CLUSTERS", Main.ClusterIndex())
+    monkeypatch.setattr(Main, "enrich", fake_enrich)
+    with TestClient(Main.app):
+        pass
+    assert sorted(enriched) == ["inv-0", "inv-2"]
+    assert make_store(db_path).pending() == []
@@ -0,0 +1,84 @@
+import json
+import random
+import re
+
+import pytest
+
+import Main
+
+LOOKALIKE = re.compile(r"[@%]|0auth|paypa1|mícrosoft|faceb00k|g00gle")
+
+
+def reference_score(url: str) -> int:
+    # 키워드마다 부분 문자열 검사를 하던 기존 구현
+    score = 0
+    u = url.lower()
+    for w in Main.BAD_WORDS:
+        if w in u:
+            score += 8
+    for b in Main.BRANDS:
+        if b in u:
+            score += 10
+    if len(url) > 120:
+        score += 5
+    if url.count("?") + url.count("&") > 3:
+        score += 5
+    if LOOKALIKE.search(u):
+        score += 12
+    ext = Main.TLD_EXTRACT(url)
+    tld = (ext.suffix or "").split(".")[-1]
+    if tld in Main.SUSPICIOUS_TLDS:
+        score += 10
+    if ext.subdomain and len(ext.subdomain.split(".")) >= 2:
+        score += 6
+    return min(score, 100)
+
+
+def random_url(rng: random.Random) -> str:
+    words = Main.BAD_WORDS + Main.BRANDS + ["0auth", "paypa1", "g00gle", "kbsta", "logi", "nhn", "x", "a-b"]
+    tlds = Main.SUSPICIOUS_TLDS + ["com", "co.kr", "net", "org", "kr"]
+    host = ".".join(rng.choice(words) + rng.choice(["", "1", "-", "x"]) for _ in range(rng.randint(1, 4)))
+    path = "/".join(rng.choice(words).upper() if rng.random() < 0.2 else rng.choice(words)
+                    for _ in range(rng.randint(0, 6)))
+    query = "&".join(f"{rng.choice(words)}={rng.choice(words)}" for _ in range(rng.randint(0, 5)))
+    url = f"https://{host}.{rng.choice(tlds)}/{path}"
+    if query:
+        url += "?" + query
+    if rng.random() < 0.1:
+        url += rng.choice(["%2F", "@evil", "#frag"])
+    return url
+
+
+def test_matcher_matches_reference_scorer():
+    rng = random.Random(20250407)
+    for _ in range(5000):
+        url = random_url(rng)
+        assert Main.heuristic_score(url) == reference_score(url), url
+
+
+def test_matcher_finds_overlapping_keywords():
+    matcher = Main.KeywordMatcher({"kb": 1, "kbstar": 10, "star": 100, "nh": 1000})
+    assert matcher.score("xkbstarx") == 111
+    assert matcher.score("kbkbkb") == 1  # 같은 키워드는 한 번만
+    assert matcher.score("") == 0
+
+
+@pytest.mark.parametrize("data", [
+    [1, 2],
+    {"brands": "acme"},
+    {"brands": [1]},
+    {"bad_words": [""]},
+])
+def test_load_rules_rejects_bad_shapes(tmp_path, data):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    with pytest.raises(ValueError):
+        Main.load_rules(str(path))
+
+
+def test_load_rules_lowercases_and_defaults(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"brands": ["ACME"]}), encoding="utf-8")
+    rules = Main.load_rules(str(path))
+    assert rules.matcher.score("https://acme.example/login") == 18
+    assert rules.suspicious_tlds == frozenset(Main.SUSPICIOUS_TLDS)
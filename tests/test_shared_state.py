@@ -0,0 +1,107 @@
+import asyncio
+import sqlite3
+
+from conftest import make_inv, make_store
+
+import Main
+
+
+def test_changes_since_reports_row_revs(db_path):
+    store = make_store(db_path, shared=True)
+    store.add(make_inv(0))
+    store.add(make_inv(1))
+    changes = store.changes_since(0)
+    assert [(rev, inv.id) for rev, inv in changes] == [(1, "inv-0"), (2, "inv-1")]
+    assert store.changes_since(1)[0][1].id == "inv-1"
+
+
+def test_follow_shared_changes_keeps_rows_committed_mid_poll(db_path, monkeypatch):
+    store = make_store(db_path, shared=True)
+    writer = make_store(db_path, shared=True)   # 다른 워커
+    monkeypatch.setattr(Main, "STORE", store)
+    monkeypatch.setattr(Main, "CLUSTERS", Main.ClusterIndex())
+    monkeypatch.setattr(Main, "SHARED_POLL_INTERVAL", 0.01)
+    read_changes = store.changes_since
+    extra = iter(range(100, 200))
+
+    def racing_changes(rev):
+        rows = read_changes(rev)
+        writer.add(make_inv(next(extra)))  # 읽은 직후, 다음 읽기 전에 커밋된 행
+        return rows
+
+    monkeypatch.setattr(store, "changes_since", racing_changes)
+
+    async def scenario():
+        task = asyncio.create_task(Main.follow_shared_changes(store.version))
+        writer.add(make_inv(0))
+        await asyncio.sleep(0.1)
+        task.cancel()
+
+    asyncio.run(scenario())
+    assert Main.CLUSTERS.cluster_of("inv-0") is not None
+    assert Main.CLUSTERS.cluster_of("inv-100") is not None
+
+
+def test_hits_survive_stale_copies(db_path):
+    store = make_store(db_path, shared=True)
+    other = make_store(db_path, shared=True)
+    store.add(make_inv(0))
+    enriching = other.get("inv-0")      # 보강 작업이 await 동안 쥐고 있는 사본
+    stale = store.get("inv-0")
+    for _ in range(5):
+        store.add_hit(store.get("inv-0"))
+    enriching.ip, enriching.enrichment, enriching.whois = "10.0.0.1", "enriched", {"asn": "64512"}
+    other.update_enrichment(enriching)
+    store.add_hit(stale)                 # 보강 전에 읽은 사본으로 한 번 더 제출
+    inv = store.get("inv-0")
+    assert inv.hits == 7
+    assert inv.enrichment == "enriched"
+    assert inv.ip == "10.0.0.1"
+    assert inv.last_seen_at is not None
+
+
+def test_recent_page_is_not_cached_under_a_newer_version(db_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    store = make_store(db_path, shared=True)
+    writer = make_store(db_path, shared=True)   # 다른 워커
+    monkeypatch.setattr(Main, "STORE", store)
+    monkeypatch.setattr(Main, "_RECENT_CACHE", type(Main._RECENT_CACHE)())
+    writer.add(make_inv(0))
+    query = store.query
+
+    def racing_query(*args, **kwargs):
+        result = query(*args, **kwargs)
+        writer.add(make_inv(next(extra)))  # 조회 직후, 응답을 캐시하기 전에 커밋
+        return result
+
+    extra = iter(range(100, 200))
+    monkeypatch.setattr(store, "query", racing_query)
+    client = TestClient(Main.app)
+    first = client.get("/recent")
+    monkeypatch.setattr(store, "query", query)
+    second = client.get("/recent", headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 200
+    assert "row-inv-100" in second.text
+
+
+def test_background_workers_survive_a_failed_iteration(monkeypatch):
+    calls = []
+
+    class FlakyQueue:
+        def claim(self):
+            calls.append(1)
+            if len(calls) == 1:
+                raise sqlite3.OperationalError("database is locked")
+            return None
+
+    monkeypatch.setattr(Main, "ENRICH_QUEUE", FlakyQueue())
+    monkeypatch.setattr(Main, "SHARED_POLL_INTERVAL", 0.001)
+
+    async def scenario():
+        task = asyncio.create_task(Main.enrichment_worker())
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    asyncio.run(scenario())
+    assert len(calls) > 1   # 첫 예외 뒤에도 계속 큐를 확인한다
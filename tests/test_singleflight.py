@@ -0,0 +1,106 @@
+import asyncio
+import datetime
+
+import pytest
+
+from conftest import make_inv, make_store
+
+import Main
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flights = Main.SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flights.do("k", work) for _ in range(5)))
+        return calls, results, flights
+
+    calls, results, flights = run(scenario())
+    assert len(calls) == 1
+    assert [r for r, _ in results] == ["result"] * 5
+    assert [leader for _, leader in results].count(True) == 1
+    assert flights._calls == {}
+
+
+def test_waiters_retry_when_leader_is_cancelled():
+    async def scenario():
+        flights = Main.SingleFlight()
+        started = []
+
+        async def work():
+            started.append(1)
+            await asyncio.sleep(0.05)
+            return len(started)
+
+        leader = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(flights.do("k", work)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*waiters), started
+
+    results, started = run(scenario())
+    assert len(started) == 2  # 취소된 첫 실행 + 다시 실행한 한 번
+    assert [r for r, _ in results] == [2, 2, 2]
+    assert [leader for _, leader in results].count(True) == 1
+
+
+def test_cancelled_waiter_does_not_affect_leader():
+    async def scenario():
+        flights = Main.SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        leader = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0.005)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        return await leader
+
+    assert run(scenario()) == ("done", True)
+
+
+def test_errors_reach_every_waiter():
+    async def scenario():
+        flights = Main.SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        return await asyncio.gather(*(flights.do("k", work) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in run(scenario()))
+
+
+def test_rules_reload_drops_cached_verdicts(db_path, monkeypatch):
+    store = make_store(db_path, shared=True)
+    monkeypatch.setattr(Main, "STORE", store)
+    monkeypatch.setattr(Main, "SHARED_STATE", True)
+    monkeypatch.setattr(Main, "VERDICTS", Main.TTLCache("verdict", maxsize=10, ttl=3600, negative_ttl=0))
+    canonical = "https://site0.example.com/"
+    store.add(make_inv(0, canonical_url=canonical, submitted_at=datetime.datetime.now()))
+    Main.VERDICTS.put(canonical, "inv-0")
+    assert Main.find_verdict(canonical).id == "inv-0"
+
+    Main.reload_rules()
+    assert Main.VERDICTS.get(canonical) is None
+    # 다른 워커의 기록을 찾는 디스크 조회도 새 규칙을 읽어 들인 뒤의 조사만 재사용한다
+    assert Main.find_verdict(canonical) is None
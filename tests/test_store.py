@@ -0,0 +1,70 @@
+from conftest import make_inv, make_store
+
+
+def all_pages(store, limit, **filters):
+    seqs, cursor = [], None
+    while True:
+        items, cursor = store.query(limit=limit, cursor=cursor, **filters)
+        seqs += [inv.seq for inv in items]
+        if cursor is None:
+            return seqs
+
+
+def test_pagination_spans_memory_and_disk(db_path):
+    store = make_store(db_path)
+    for i in range(10):
+        store.add(make_inv(i))
+    assert all_pages(store, 4) == list(range(10, 0, -1))
+    items, cursor = store.query(limit=4)
+    assert [inv.id for inv in items] == ["inv-9", "inv-8", "inv-7", "inv-6"]
+    assert cursor == 7
+
+
+def test_filters_match_full_scan(db_path):
+    store = make_store(db_path)
+    invs = [make_inv(i, domain=f"d{i % 3}.com", score=(i * 37) % 101) for i in range(30)]
+    for inv in invs:
+        store.add(inv)
+    for i in (1, 5, 28):
+        invs[i].ip = "10.0.0.1"
+        store.update_enrichment(invs[i])
+
+    def expected(pred):
+        return [inv.seq for inv in reversed(invs) if pred(inv)]
+
+    assert all_pages(store, 4, domain="d1.com") == expected(lambda inv: inv.domain == "d1.com")
+    assert all_pages(store, 4, ip="10.0.0.1") == expected(lambda inv: inv.ip == "10.0.0.1")
+    assert all_pages(store, 4, decision="내부 차단") == expected(lambda inv: inv.decision == "내부 차단")
+    for min_score in (0, 45, 80, 100, 101):
+        assert all_pages(store, 4, min_score=min_score) == expected(lambda inv: inv.score >= min_score)
+    assert all_pages(store, 2, domain="d2.com", min_score=50) == \
+        expected(lambda inv: inv.domain == "d2.com" and inv.score >= 50)
+
+
+def test_min_score_query_uses_band_index(db_path):
+    store = make_store(db_path)
+    sql, args = store._score_band_query(["seq < ?"], [100], 80, 21)
+    plan = " ".join(row[-1] for row in store._db.execute("EXPLAIN QUERY PLAN " + sql, args))
+    assert "idx_inv_score_band" in plan
+    assert "SCAN investigations" not in plan
+
+
+def test_restart_keeps_newest_rows_and_seq(db_path):
+    store = make_store(db_path)
+    for i in range(5):
+        store.add(make_inv(i))
+    reopened = make_store(db_path)
+    assert len(reopened) == 5
+    assert [inv.id for inv in reopened.recent()] == [f"inv-{i}" for i in range(4, -1, -1)]
+    new = make_inv(5)
+    reopened.add(new)
+    assert new.seq == 6
+
+
+def test_version_persists_across_restart(db_path):
+    store = make_store(db_path)
+    store.add(make_inv(0))
+    reopened = make_store(db_path)
+    assert reopened.version == store.version == 1
+    assert reopened.epoch == store.epoch
+    assert make_store("").epoch != make_store("").epoch
@@ -0,0 +1,34 @@
+import pytest
+
+import templates
+
+
+@pytest.mark.parametrize("header, expected", [
+    ('W/"abc"', True),
+    ('"abc"', True),
+    ('W/"x", W/"abc"', True),
+    ("*", True),
+    ('W/"x"', False),
+    ("", False),
+])
+def test_etag_matches(header, expected):
+    assert templates.etag_matches(header, 'W/"abc"') is expected
+
+
+@pytest.mark.parametrize("header, with_brotli, expected", [
+    ("gzip, br", True, "br"),
+    ("br;q=0.1, gzip;q=0.9", True, "gzip"),
+    ("br;q=0, *", True, "gzip"),
+    ("*", False, "gzip"),
+    ("gzip;q=0, identity", True, None),
+    ("gzip, br", False, "gzip"),
+    ("", True, None),
+])
+def test_negotiate_encoding(monkeypatch, header, with_brotli, expected):
+    monkeypatch.setattr(templates, "brotli", object() if with_brotli else None)
+    assert templates.negotiate_encoding(header) == expected
+
+
+def test_template_escapes_values_but_not_raw():
+    tpl = templates.Template("<p>{a}{b}</p>")
+    assert tpl.render(a="<x>", b=templates.Raw("<b>")) == "<p>&lt;x&gt;<b></p>"